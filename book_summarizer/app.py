@@ -1,12 +1,17 @@
 import os
 import shutil
-import numpy as np
-import faiss
 from pathlib import Path
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Request
 from fastapi.responses import HTMLResponse
 from transformers import pipeline
 from sentence_transformers import SentenceTransformer
+from store import BookStore
+from workers import SUMMARY_TIMEOUT, ModelPool
+from batcher import GenerationBatcher
+from summarizer import FINAL_SETTINGS, MapReduceSummarizer, SummaryCache
+from qa_cache import LIBRARY_SCOPE, AnswerCache
+from chunker import Chunker
+from streaming import event_stream, stream_generation
 
 app = FastAPI()
 
@@ -16,21 +21,43 @@ DATA_DIR.mkdir(exist_ok=True)
 
 # Global AI components
 gen_model = None
+generator = None
+summarizer = None
 encoder = None
-current_index = None
-current_chunks = []
-current_book_name = "None"
+chunker = None
+store = None
+# Model calls run here, off the event loop
+model_pool = ModelPool()
+# Answers to repeated and near-duplicate questions
+answer_cache = AnswerCache()
+
+# Models
+GEN_MODEL_NAME = "google/flan-t5-base"
+GEN_MAX_TOKENS = 512  # flan-t5 input window; longer prompts lose their end, i.e. the question
+
+# Retrieval
+TOP_K = 5
+QA_PROMPT = "Answer based on context: {context} Question: {question}"
+# Repetition penalty fixes the "fox, fox" issue
+QA_SETTINGS = {"max_length": 150, "repetition_penalty": 2.5}
 
 
 @app.on_event("startup")
 async def startup_event():
-    global gen_model, encoder
+    global gen_model, generator, summarizer, encoder, chunker, store
     print("🚀 Loading AI models... (This may take a minute on first run)")
     # Generative model for summarization and logic
-    gen_model = pipeline("text2text-generation", model="google/flan-t5-base")
+    gen_model = pipeline("text2text-generation", model=GEN_MODEL_NAME)
+    # Concurrent prompts are run through the model together as padded batches
+    generator = GenerationBatcher(gen_model)
+    summarizer = MapReduceSummarizer(generator, gen_model.tokenizer, SummaryCache(), GEN_MODEL_NAME)
     # Semantic encoder for search
     encoder = SentenceTransformer('all-MiniLM-L6-v2')
-    print("✅ Models loaded.")
+    # Sentence-aligned chunks sized in the encoder's own tokens, so none are truncated when embedded
+    chunker = Chunker(encoder.tokenizer)
+    # Persisted library: embeddings are memory-mapped, chunk text stays in SQLite
+    store = BookStore()
+    print(f"✅ Models loaded. {len(store.books())} books in the library.")
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -50,8 +77,8 @@ async def get_gui():
         </head>
         <body>
             <div class="container">
-                <h2>📖 Solo-Book Explorer</h2>
-                <p>Current: <b id="bn">{current_book_name}</b></p>
+                <h2>📖 Book Library Explorer</h2>
+                <p>Book: <select id="bn"><option value="all">All books</option></select></p>
                 <input type="file" id="f" accept=".txt">
                 <button class="btn-upload" onclick="u()">Upload & Index</button>
                 <hr>
@@ -61,14 +88,40 @@ async def get_gui():
                 <div id="res"></div>
             </div>
             <script>
+                async function loadBooks(selected) {{
+                    const r = await fetch('/books');
+                    const d = await r.json();
+                    const sel = document.getElementById('bn');
+                    // Book names come from uploaded filenames, so they are set as text, never as HTML
+                    sel.replaceChildren(new Option('All books', 'all'), ...d.books.map(b => new Option(b, b)));
+                    if (selected) sel.value = selected;
+                }}
+                loadBooks();
                 async function u() {{
                     const file = document.getElementById('f').files[0];
                     if(!file) return;
                     const fd = new FormData(); fd.append("file", file);
                     document.getElementById('res').style.display = "block";
                     document.getElementById('res').innerText = "Indexing...";
-                    await fetch('/upload', {{ method: 'POST', body: fd }});
-                    location.reload();
+                    const r = await fetch('/upload', {{ method: 'POST', body: fd }});
+                    const d = await r.json();
+                    document.getElementById('res').innerText = `Indexed ${{d.book}} (${{d.chunks}} chunks)`;
+                    loadBooks(d.book);
+                }}
+                function el(tag, text) {{
+                    const e = document.createElement(tag);
+                    if (text !== undefined) e.textContent = text;
+                    return e;
+                }}
+                function show(out, d) {{
+                    // Answers and passages are book text: appended as text nodes so they cannot inject markup
+                    out.replaceChildren(el('b', 'Result:'), el('br'), d.answer || d.summary || '');
+                    if (d.sources && d.sources.length) {{
+                        out.append(el('br'), el('br'), el('b', 'Sources:'));
+                        for (const p of d.sources) {{
+                            out.append(el('br'), el('i', `${{p.book}} #${{p.position}}`), `: ${{p.text.slice(0, 200)}}…`);
+                        }}
+                    }}
                 }}
                 async function a(t) {{
                     const out = document.getElementById('res');
@@ -78,10 +131,40 @@ async def get_gui():
                     const r = await fetch(ep, {{
                         method: 'POST',
                         headers: {{'Content-Type': 'application/x-www-form-urlencoded'}},
-                        body: new URLSearchParams({{ 'question': document.getElementById('q').value }})
+                        body: new URLSearchParams({{
+                            'question': document.getElementById('q').value,
+                            'book_name': document.getElementById('bn').value,
+                            'stream': '1'
+                        }})
                     }});
-                    const d = await r.json();
-                    out.innerHTML = `<b>Result:</b><br>${{d.answer || d.summary}}`;
+                    // Cached answers and errors come back as plain JSON
+                    if (!(r.headers.get('content-type') || '').startsWith('text/event-stream')) {{
+                        const d = await r.json();
+                        if (!r.ok) {{ out.innerText = d.detail; return; }}
+                        show(out, d);
+                        return;
+                    }}
+                    // Server-sent events: render the text as it is generated
+                    const reader = r.body.getReader();
+                    const decoder = new TextDecoder();
+                    let buffer = '', text = '';
+                    while (true) {{
+                        const {{ value, done }} = await reader.read();
+                        if (done) break;
+                        buffer += decoder.decode(value, {{ stream: true }});
+                        const events = buffer.split('\\n\\n');
+                        buffer = events.pop();
+                        for (const e of events) {{
+                            const d = JSON.parse(e.replace(/^data: /, ''));
+                            if (d.error) {{ out.innerText = d.error; return; }}
+                            if (d.status) out.innerText = d.status;
+                            if (d.token) {{
+                                text += d.token;
+                                out.replaceChildren(el('b', 'Result:'), el('br'), text);
+                            }}
+                            if (d.done) show(out, d);
+                        }}
+                    }}
                 }}
             </script>
         </body>
@@ -89,37 +172,164 @@ async def get_gui():
     """
 
 
+async def read_params(request: Request):
+    """Request fields from either a JSON body or a form, so the GUI and JSON clients share endpoints."""
+    if request.headers.get("content-type", "").startswith("application/json"):
+        return await request.json()
+    return dict(await request.form())
+
+
+def resolve_book(book_name):
+    """The stored book for a name; an empty name or "all" searches the whole library."""
+    if not book_name or book_name == "all":
+        return None, None
+    book = store.find_book(name=book_name)
+    return book, None if book else f"Unknown book: {book_name}"
+
+
+@app.get("/books")
+async def books():
+    return {"books": store.books()}
+
+
+def fit_context(passages, question):
+    """The most similar passages whose prompt still fits flan-t5's input window."""
+    tokenizer = gen_model.tokenizer
+    budget = GEN_MAX_TOKENS - len(tokenizer(QA_PROMPT.format(context="", question=question)).input_ids)
+    lengths = [len(ids) for ids in tokenizer([p["text"] for p in passages], add_special_tokens=False).input_ids]
+    fitted = []
+    for passage, length in zip(passages, lengths):
+        if fitted and length > budget:
+            break
+        fitted.append(passage)
+        budget -= length
+    return fitted
+
+
+def cache_scope(book):
+    return book["sha256"] if book else LIBRARY_SCOPE
+
+
+def retrieve(question, book, use_cache=True):
+    """Question embedding and the passages that fit the prompt, or the cached result of a near-duplicate question."""
+    # Top-k within one book only scans that book's vectors, so latency does not grow with the library
+    q_emb = encoder.encode([question])
+    cached = answer_cache.get_similar(cache_scope(book), q_emb[0]) if use_cache else None
+    if cached: return q_emb[0], [], cached
+    _, i = store.search(q_emb, k=TOP_K, book=book)
+    return q_emb[0], fit_context(store.passages(i[0]), question), None
+
+
+def qa_prompt(question, passages):
+    return QA_PROMPT.format(context=" ".join(p["text"] for p in passages), question=question)
+
+
+def qa_result(question, book, q_emb, passages, answer, use_cache=True):
+    result = {
+        "answer": answer,
+        "source_used": " ".join(p["text"] for p in passages),
+        "sources": [{"book": p["book"], "position": p["position"], "text": p["text"]} for p in passages],
+    }
+    if use_cache:
+        answer_cache.put(cache_scope(book), question, q_emb, result)
+    return result
+
+
+def answer_question(question, book, use_cache=True):
+    """Retrieval and generation for one question; blocking, so it runs on the model pool."""
+    q_emb, passages, cached = retrieve(question, book, use_cache)
+    if cached: return cached
+    answer = generator.generate(qa_prompt(question, passages), **QA_SETTINGS)
+    return qa_result(question, book, q_emb, passages, answer, use_cache)
+
+
+async def stream_answer(question, book, use_cache=True):
+    """/qa as events: generated text as it is produced, then the full result with its sources."""
+    q_emb, passages, cached = await model_pool.run(retrieve, question, book, use_cache, reserved=True)
+    if cached:
+        yield {"done": True, **cached}
+        return
+    answer = ""
+    async for piece in stream_generation(generator, gen_model, qa_prompt(question, passages), **QA_SETTINGS):
+        answer += piece
+        yield {"token": piece}
+    yield {"done": True, **qa_result(question, book, q_emb, passages, answer.strip(), use_cache)}
+
+
+def add_book(name, content):
+    previous = store.find_book(name=name)
+    book, embedded = store.add_book(name, content, encoder.encode, chunker)
+    if not previous or previous["sha256"] != book["sha256"]:
+        # Answers about the replaced text, and library-wide answers, may no longer hold
+        answer_cache.invalidate(previous["sha256"] if previous else None)
+    return book, embedded
+
+
+def summarize_book(book):
+    # Map-reduce over every chunk; partial summaries are cached, so repeated work is skipped
+    summary, work = summarizer.summarize(store.book_chunks(book))
+    return {"summary": summary, **work}
+
+
+def prepare_summary(book):
+    return summarizer.reduce(store.book_chunks(book))
+
+
+async def stream_summary(book):
+    """/summarize as events: progress while the chunks are mapped and reduced, then the final summary as it is generated."""
+    yield {"status": f"Summarizing {book['chunk_count']} chunks..."}
+    prompt, work = await model_pool.run(prepare_summary, book, timeout=SUMMARY_TIMEOUT, reserved=True)
+    summary = summarizer.cached(prompt, **FINAL_SETTINGS)
+    if summary is None:
+        summary = ""
+        async for piece in stream_generation(generator, gen_model, prompt, **FINAL_SETTINGS):
+            summary += piece
+            yield {"token": piece}
+        summary = summary.strip()
+        summarizer.remember(prompt, summary, **FINAL_SETTINGS)
+    yield {"done": True, "summary": summary, **work}
+
+
+def flag(params, name):
+    return str(params.get(name, "")).lower() in ("1", "true", "yes")
+
+
+@app.get("/stats")
+async def stats():
+    return {**model_pool.stats(), "generation": generator.stats(), "answer_cache": answer_cache.stats()}
+
+
 @app.post("/upload")
 async def upload(file: UploadFile = File(...)):
-    global current_index, current_chunks, current_book_name
     content = (await file.read()).decode("utf-8")
-    words = content.split()
-    current_chunks = [" ".join(words[i:i + 300]) for i in range(0, len(words), 300)]
-    current_book_name = file.filename
-
-    embeddings = encoder.encode(current_chunks)
-    current_index = faiss.IndexFlatL2(embeddings.shape[1])
-    current_index.add(np.array(embeddings).astype('float32'))
-    return {"status": "ok"}
+    # Books whose content is already indexed are not embedded again
+    book, embedded = await model_pool.run(add_book, file.filename, content, timeout=SUMMARY_TIMEOUT)
+    return {"status": "ok", "book": book["name"], "chunks": book["chunk_count"], "embedded": embedded}
 
 
 @app.post("/qa")
-async def qa(question: str = Form(...)):
-    if not current_index: return {"answer": "Upload a book first."}
-    q_emb = encoder.encode([question])
-    _, i = current_index.search(q_emb.astype('float32'), k=5)
-    context = " ".join([current_chunks[idx] for idx in i[0]])
-    # Prompt with repetition penalty to fix the "fox, fox" issue
-    res = gen_model(f"Answer based on context: {context} Question: {question}", max_length=150, repetition_penalty=2.5)
-    return {"answer": res[0]['generated_text']}
+async def qa(request: Request):
+    params = await read_params(request)
+    question = params.get("question", "")
+    if not store.books(): return {"answer": "Upload a book first.", "source_used": "", "sources": []}
+    book, error = resolve_book(params.get("book_name"))
+    if error: return {"answer": error, "source_used": "", "sources": []}
+    # no_cache skips both cache levels, e.g. so a load test measures the model
+    use_cache = not flag(params, "no_cache")
+    # Exact repeats are answered without taking a model worker
+    cached = answer_cache.get_exact(cache_scope(book), question) if use_cache else None
+    if cached: return cached
+    if flag(params, "stream"): return event_stream(model_pool, stream_answer(question, book, use_cache))
+    return await model_pool.run(answer_question, question, book, use_cache)
 
 
 @app.post("/summarize")
-async def summarize():
-    if not current_chunks: return {"summary": "No book."}
-    partials = [gen_model(f"summarize: {c}", max_length=50)[0]['generated_text'] for c in current_chunks[:15]]
-    res = gen_model("Summarize these points: " + " ".join(partials), max_length=300, repetition_penalty=2.0)
-    return {"summary": res[0]['generated_text']}
+async def summarize(request: Request):
+    params = await read_params(request)
+    book, error = resolve_book(params.get("book_name"))
+    if not book: return {"summary": error or "Pick a book to summarize."}
+    if flag(params, "stream"): return event_stream(model_pool, stream_summary(book))
+    return await model_pool.run(summarize_book, book, timeout=SUMMARY_TIMEOUT)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,105 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Micro-batching
+MAX_BATCH_SIZE = 8  # Prompts per padded generate() call
+MAX_WAIT_MS = 10  # How long the first prompt waits for others to join its batch
+
+
+class GenerationBatcher:
+    """
+    Collects prompts from concurrent callers for up to MAX_WAIT_MS (or MAX_BATCH_SIZE
+    prompts) and runs them through the text2text pipeline as one padded batch on a
+    single thread, then hands every caller its own result. Prompts only share a batch
+    when their generation settings match.
+    """
+
+    def __init__(self, pipe, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.pipe = pipe
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.prompts = 0
+        threading.Thread(target=self._loop, name="generation-batcher", daemon=True).start()
+
+    def submit(self, prompt, **generate_kwargs):
+        future = Future()
+        self.queue.put((prompt, tuple(sorted(generate_kwargs.items())), future))
+        return future
+
+    def generate(self, prompt, **generate_kwargs):
+        """Generated text for one prompt, batched with whatever else is waiting."""
+        return self.submit(prompt, **generate_kwargs).result()
+
+    def generate_many(self, prompts, **generate_kwargs):
+        """Generated texts for several prompts; they are queued together so they share batches."""
+        futures = [self.submit(prompt, **generate_kwargs) for prompt in prompts]
+        return [future.result() for future in futures]
+
+    def run_exclusive(self, fn):
+        """
+        Runs `fn()` on the batcher thread between batches and returns its future. Used for
+        streamed generations, which follow a single sequence and cannot share a batch, so
+        the model is still only ever driven by this one thread.
+        """
+        future = Future()
+        self.queue.put((fn, None, future))
+        return future
+
+    def _collect(self):
+        """Blocks for one prompt, then gathers more until the batch is full or the wait is over."""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            groups = {}
+            for item in batch:
+                if callable(item[0]):
+                    self._call(*item)
+                else:
+                    groups.setdefault(item[1], []).append(item)
+            for settings, items in groups.items():
+                self._run(dict(settings), items)
+
+    @staticmethod
+    def _call(fn, _, future):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn())
+        except Exception as e:
+            future.set_exception(e)
+
+    def _run(self, generate_kwargs, items):
+        prompts = [prompt for prompt, _, _ in items]
+        try:
+            results = self.pipe(prompts, batch_size=len(prompts), **generate_kwargs)
+        except Exception as e:
+            for _, _, future in items:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.prompts += len(prompts)
+        for (_, _, future), result in zip(items, results):
+            # The pipeline returns one dict per prompt, or a one-element list of dicts
+            result = result[0] if isinstance(result, list) else result
+            future.set_result(result["generated_text"])
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "prompts": self.prompts,
+            "mean_batch_size": round(self.prompts / self.batches, 2) if self.batches else 0.0,
+        }
@@ -0,0 +1,84 @@
+import argparse
+import threading
+import time
+
+from transformers import pipeline
+
+from batcher import GenerationBatcher
+from store import BookStore
+
+MODEL_NAME = "google/flan-t5-base"
+BATCH_SIZES = [1, 2, 4, 8, 16]
+PROMPTS = 32
+MAX_LENGTH = 50
+
+
+def sample_prompts(count):
+    """Summarization prompts built from library chunks, or a fixed passage when the library is empty."""
+    chunks = []
+    try:
+        store = BookStore()
+    except RuntimeError:
+        store = None  # The app has the library open
+    for name in store.books() if store else []:
+        chunks += store.book_chunks(store.find_book(name=name), limit=count)
+        if len(chunks) >= count:
+            break
+    if not chunks:
+        chunks = ["Alice was beginning to get very tired of sitting by her sister on the bank, and of having "
+                  "nothing to do: once or twice she had peeped into the book her sister was reading."] * count
+    return [f"summarize: {chunk}" for chunk in (chunks * count)[:count]]
+
+
+def run_direct(pipe, prompts, batch_size):
+    start = time.perf_counter()
+    for offset in range(0, len(prompts), batch_size):
+        pipe(prompts[offset:offset + batch_size], batch_size=batch_size, max_length=MAX_LENGTH)
+    return time.perf_counter() - start
+
+
+def run_concurrent(pipe, prompts, max_batch_size):
+    """One thread per prompt, as concurrent /qa callers would be, going through the batcher."""
+    batcher = GenerationBatcher(pipe, max_batch_size=max_batch_size)
+    latencies = []
+
+    def call(prompt):
+        start = time.perf_counter()
+        batcher.generate(prompt, max_length=MAX_LENGTH)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=call, args=(prompt,)) for prompt in prompts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, sorted(latencies), batcher.stats()["mean_batch_size"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generation throughput per batch size.")
+    parser.add_argument("--prompts", type=int, default=PROMPTS)
+    args = parser.parse_args()
+
+    print(f"Loading {MODEL_NAME}...")
+    pipe = pipeline("text2text-generation", model=MODEL_NAME)
+    prompts = sample_prompts(args.prompts)
+    pipe(prompts[:2], batch_size=2, max_length=MAX_LENGTH)  # Warm-up
+
+    print(f"\nDirect pipeline calls ({len(prompts)} prompts, max_length={MAX_LENGTH})")
+    baseline = None
+    for batch_size in BATCH_SIZES:
+        elapsed = run_direct(pipe, prompts, batch_size)
+        baseline = baseline or elapsed
+        print(f"  batch {batch_size:>2}: {len(prompts) / elapsed:6.2f} prompts/s ({baseline / elapsed:.2f}x)")
+
+    print(f"\nConcurrent callers through GenerationBatcher ({len(prompts)} threads)")
+    for max_batch_size in BATCH_SIZES:
+        elapsed, latencies, mean_batch = run_concurrent(pipe, prompts, max_batch_size)
+        print(f"  max batch {max_batch_size:>2}: {len(prompts) / elapsed:6.2f} prompts/s | mean batch {mean_batch:5.2f} | "
+              f"p50 {latencies[len(latencies) // 2]:.2f}s | max {latencies[-1]:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
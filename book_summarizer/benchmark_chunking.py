@@ -0,0 +1,92 @@
+import argparse
+import random
+import re
+import time
+from pathlib import Path
+
+import faiss
+from sentence_transformers import SentenceTransformer
+
+from chunker import Chunker, iter_sentences
+from vector_index import normalize
+
+DATA_DIR = Path("data")
+WORD_CHUNK = 300  # The previous splitter: fixed runs of 300 words
+QUERIES_PER_BOOK = 100
+TOP_K = 5
+SEED = 42
+
+
+def word_chunks(content, size=WORD_CHUNK):
+    words = content.split()
+    return [" ".join(words[i:i + size]) for i in range(0, len(words), size)]
+
+
+def squash(text):
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def sample_queries(books, per_book, seed):
+    """
+    Random mid-length sentences of each book. A query is answered when a top-k chunk
+    contains the whole sentence: that fails when a chunk cuts the sentence in two, or
+    when the sentence sits past the encoder's token window and never got embedded.
+    """
+    rng = random.Random(seed)
+    queries = []
+    for sentences in books.values():
+        candidates = [s for s in sentences if 10 <= len(s.split()) <= 40]
+        queries += rng.sample(candidates, min(per_book, len(candidates)))
+    return queries
+
+
+def evaluate(name, split, books, queries, encoder):
+    start = time.perf_counter()
+    chunks = [squash(chunk) for content in books for chunk in split(content)]
+    chunk_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectors = normalize(encoder.encode(chunks, batch_size=64))
+    embed_time = time.perf_counter() - start
+
+    lengths = [len(ids) for ids in encoder.tokenizer(chunks, add_special_tokens=True)["input_ids"]]
+    truncated = sum(length > encoder.max_seq_length for length in lengths)
+
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    index.add(vectors)
+    _, ids = index.search(normalize(encoder.encode(queries, batch_size=64)), TOP_K)
+    hits_1 = hits_k = reciprocal = 0
+    for query, row in zip(queries, ids):
+        ranks = [rank for rank, i in enumerate(row) if query in chunks[i]]
+        hits_1 += bool(ranks) and ranks[0] == 0
+        hits_k += bool(ranks)
+        reciprocal += 1 / (ranks[0] + 1) if ranks else 0
+
+    print(f"{name:<14} | {len(chunks):>6} chunks | mean {sum(lengths) / len(lengths):5.0f} tokens | "
+          f"truncated {truncated / len(chunks):6.1%} | chunking {chunk_time:6.2f}s | embedding {embed_time:7.2f}s | "
+          f"hit@1 {hits_1 / len(queries):.3f} | hit@{TOP_K} {hits_k / len(queries):.3f} | "
+          f"MRR {reciprocal / len(queries):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Word splitter vs token-aware chunker: indexing time and retrieval.")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--queries", type=int, default=QUERIES_PER_BOOK, help="Queries per book")
+    args = parser.parse_args()
+
+    books = {path.name: path.read_text(encoding="utf-8") for path in sorted(args.data_dir.glob("*.txt"))}
+    if not books:
+        print(f"No books found in {args.data_dir}")
+        return
+    encoder = SentenceTransformer('all-MiniLM-L6-v2')
+    sentences = {name: [squash(s) for s in iter_sentences(content.splitlines())] for name, content in books.items()}
+    queries = sample_queries(sentences, args.queries, SEED)
+    print(f"{len(books)} books, {len(queries)} sentence queries, encoder window {encoder.max_seq_length} tokens\n")
+
+    chunker = Chunker(encoder.tokenizer)
+    evaluate(f"words ({WORD_CHUNK})", word_chunks, books.values(), queries, encoder)
+    evaluate("token-aware", chunker.chunks, books.values(), queries, encoder)
+
+
+if __name__ == "__main__":
+    main()
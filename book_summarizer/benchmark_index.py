@@ -0,0 +1,118 @@
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+import vector_index
+from vector_index import make_index, normalize, training_sample, tune
+
+# Synthetic corpus
+CHUNKS = 2_000_000
+DIM = 384  # all-MiniLM-L6-v2
+TOPICS = 4096  # Cluster centres, so neighbours are structured like real embeddings
+INTRINSIC_DIM = 24  # Within a topic, chunks vary along a few directions, as sentence embeddings do
+QUERIES = 1000
+LATENCY_QUERIES = 200  # Queries timed one at a time
+K = 10
+SEED = 0
+
+# Search parameters to sweep
+NPROBES = [1, 4, 16, 32, 64, 128]
+EF_SEARCHES = [16, 32, 64, 128]
+
+
+def synthetic_corpus(chunks, dim, rng, block=100_000):
+    """Normalized vectors around TOPICS random centres, varying mostly in a low-dimensional subspace."""
+    centres = rng.standard_normal((TOPICS, dim), dtype=np.float32)
+    directions = rng.standard_normal((INTRINSIC_DIM, dim), dtype=np.float32)
+    corpus = np.empty((chunks, dim), dtype=np.float32)
+    for start in range(0, chunks, block):
+        size = min(block, chunks - start)
+        topics = rng.integers(0, TOPICS, size)
+        variation = rng.standard_normal((size, INTRINSIC_DIM), dtype=np.float32) @ directions
+        noise = 0.2 * rng.standard_normal((size, dim), dtype=np.float32)
+        corpus[start:start + size] = centres[topics] + 0.5 * variation + noise
+        faiss.normalize_L2(corpus[start:start + size])
+    return corpus
+
+
+def bytes_per_vector(index_type, dim):
+    """Approximate index memory per vector, ids included."""
+    return {
+        "flat": 4 * dim + 8,
+        "ivf_flat": 4 * dim + 8,
+        "hnsw": 4 * dim + 8 + 2 * vector_index.HNSW_NEIGHBORS * 4,
+        "ivf_pq": vector_index.PQ_SUBQUANTIZERS + 8,
+    }[index_type]
+
+
+def build(index_type, corpus):
+    ids = np.arange(len(corpus), dtype=np.int64)
+    start = time.perf_counter()
+    index = make_index(index_type, corpus.shape[1], len(corpus))
+    if not index.is_trained:
+        index.train(training_sample(corpus, ids, index.nlist, seed=SEED))
+    for offset in range(0, len(corpus), 100_000):
+        index.add_with_ids(corpus[offset:offset + 100_000], ids[offset:offset + 100_000])
+    return index, time.perf_counter() - start
+
+
+def measure(index, queries, truth):
+    """recall@K against the exact results, batched queries/s and single-query p50/p99 latency."""
+    start = time.perf_counter()
+    _, found = index.search(queries, K)
+    qps = len(queries) / (time.perf_counter() - start)
+    recall = np.mean([len(np.intersect1d(f, t)) / K for f, t in zip(found, truth)])
+
+    latencies = []
+    for query in queries[:LATENCY_QUERIES]:
+        start = time.perf_counter()
+        index.search(query[np.newaxis], K)
+        latencies.append(time.perf_counter() - start)
+    return recall, qps, np.percentile(latencies, 50) * 1000, np.percentile(latencies, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="recall@k vs latency of the library index types on a synthetic corpus.")
+    parser.add_argument("--chunks", type=int, default=CHUNKS)
+    parser.add_argument("--types", nargs="+", default=["ivf_flat", "hnsw", "ivf_pq"])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(SEED)
+    print(f"Generating {args.chunks:,} synthetic {DIM}-d chunks...")
+    corpus = synthetic_corpus(args.chunks, DIM, rng)
+    picked = rng.choice(args.chunks, QUERIES, replace=False)
+    queries = normalize(corpus[picked] + 0.1 * rng.standard_normal((QUERIES, DIM), dtype=np.float32))
+
+    print("Building the exact flat index for the ground truth...")
+    flat, build_seconds = build("flat", corpus)
+    _, truth = flat.search(queries, K)
+
+    print(f"\n{'index':>9} | {'param':>12} | {'build (s)':>9} | {'MB':>7} | {f'recall@{K}':>9} | "
+          f"{'queries/s':>9} | {'p50 (ms)':>8} | {'p99 (ms)':>8}")
+
+    def report(name, param, index, seconds):
+        recall, qps, p50, p99 = measure(index, queries, truth)
+        megabytes = bytes_per_vector(name, DIM) * args.chunks / 1e6
+        print(f"{name:>9} | {param:>12} | {seconds:>9.1f} | {megabytes:>7.0f} | {recall:>9.3f} | "
+              f"{qps:>9.0f} | {p50:>8.2f} | {p99:>8.2f}", flush=True)
+
+    report("flat", "exact", flat, build_seconds)
+    del flat
+
+    for index_type in args.types:
+        index, build_seconds = build(index_type, corpus)
+        if index_type == "hnsw":
+            for ef_search in EF_SEARCHES:
+                report(index_type, f"efSearch={ef_search}", tune(index, ef_search=ef_search), build_seconds)
+        else:
+            for nprobe in NPROBES:
+                report(index_type, f"nprobe={nprobe}", tune(index, nprobe=nprobe), build_seconds)
+        del index
+
+    print(f"\nDefaults in vector_index.py: nprobe={vector_index.NPROBE}, efSearch={vector_index.EF_SEARCH}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import itertools
+import re
+
+# Chunking
+CHUNK_TOKENS = 254  # all-MiniLM-L6-v2 embeds 256 tokens, [CLS] and [SEP] included; longer chunks are cut silently
+OVERLAP_TOKENS = 32  # Trailing sentences of a chunk repeated at the start of the next one
+TOKENIZE_BATCH = 256  # Sentences tokenized per call
+
+# A sentence ends at . ! or ? (plus closing quotes or brackets) followed by whitespace
+SENTENCE = re.compile(r"\S.*?(?:[.!?]+[\"'”’)\]]*(?=\s)|$)", re.S)
+# ...unless the period belongs to one of these
+ABBREVIATION = re.compile(r"\b(?:Mr|Mrs|Ms|Dr|St|Prof|Rev|Col|Capt|Lt|Gen|Jr|Sr|vs|etc|e\.g|i\.e|[A-Z])\.$")
+
+
+def split_sentences(text):
+    sentences = []
+    for match in SENTENCE.finditer(text):
+        if sentences and ABBREVIATION.search(sentences[-1]):
+            sentences[-1] += " " + match.group().strip()
+        else:
+            sentences.append(match.group().strip())
+    return sentences
+
+
+def iter_sentences(lines):
+    """
+    Sentences from an iterable of lines (an open file works) without reading it all.
+    Blank lines end a paragraph, so headings and paragraph ends always split.
+    """
+    buffer = ""
+    for line in lines:
+        if not line.strip():
+            yield from split_sentences(buffer)
+            buffer = ""
+            continue
+        buffer = f"{buffer} {line.strip()}" if buffer else line.strip()
+        sentences = split_sentences(buffer)
+        # The last sentence may continue on the next line
+        yield from sentences[:-1]
+        buffer = sentences[-1] if sentences else ""
+    yield from split_sentences(buffer)
+
+
+class Chunker:
+    """
+    Packs whole sentences into chunks of at most `max_tokens` tokens as counted by the
+    embedding model's tokenizer, carrying up to `overlap_tokens` of trailing sentences
+    into the next chunk. Sentences longer than a chunk are split between words, and
+    words longer than a chunk (URLs, encoded data) between tokens.
+    Works as a generator, so arbitrarily large texts are chunked in constant memory.
+    """
+
+    def __init__(self, tokenizer, max_tokens=CHUNK_TOKENS, overlap_tokens=OVERLAP_TOKENS):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def count_tokens(self, texts):
+        return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+    def _pieces(self, sentences):
+        """(text, tokens) per sentence, with sentences over max_tokens split into word runs that fit."""
+        sentences = iter(sentences)
+        while batch := list(itertools.islice(sentences, TOKENIZE_BATCH)):
+            for sentence, tokens in zip(batch, self.count_tokens(batch)):
+                if tokens <= self.max_tokens:
+                    yield sentence, tokens
+                    continue
+                words = sentence.split()
+                run, used = [], 0
+                for word, word_tokens in zip(words, self.count_tokens(words)):
+                    if word_tokens > self.max_tokens:
+                        if run:
+                            yield " ".join(run), used
+                            run, used = [], 0
+                        yield from self._split_word(word)
+                        continue
+                    if run and used + word_tokens > self.max_tokens:
+                        yield " ".join(run), used
+                        run, used = [], 0
+                    run.append(word)
+                    used += word_tokens
+                if run:
+                    yield " ".join(run), used
+
+    def _split_word(self, word):
+        """(text, tokens) pieces of a word too long for one chunk, cut at token boundaries."""
+        offsets = self.tokenizer(word, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        window = self.max_tokens
+        while True:
+            starts = [offsets[i][0] for i in range(0, len(offsets), window)]
+            pieces = [word[start:end] for start, end in zip(starts, starts[1:] + [len(word)])]
+            counts = self.count_tokens(pieces)
+            # A cut piece can tokenize into slightly more tokens than its slice of the word
+            if max(counts) <= self.max_tokens:
+                return list(zip(pieces, counts))
+            window -= max(1, window // 10)
+
+    def _overlap(self, pieces, next_tokens):
+        """Trailing pieces to repeat, within overlap_tokens and leaving room for the next piece."""
+        tail, used = [], 0
+        for text, tokens in reversed(pieces):
+            if used + tokens > self.overlap_tokens or used + tokens + next_tokens > self.max_tokens:
+                break
+            tail.insert(0, (text, tokens))
+            used += tokens
+        return tail, used
+
+    def chunks(self, text):
+        """Chunk texts for a string or an iterable of lines."""
+        lines = text.splitlines() if isinstance(text, str) else text
+        current, used = [], 0
+        for piece, tokens in self._pieces(iter_sentences(lines)):
+            # WordPiece tokenizes words independently, so joined sentences cost the sum of their tokens
+            if current and used + tokens > self.max_tokens:
+                yield " ".join(sentence for sentence, _ in current)
+                current, used = self._overlap(current, tokens)
+            current.append((piece, tokens))
+            used += tokens
+        if current:
+            yield " ".join(sentence for sentence, _ in current)
@@ -0,0 +1,86 @@
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BASE_URL = "http://localhost:8000"
+QUESTIONS = [
+    ("What did the rabbit take out of its waistcoat-pocket?", "alice.txt"),
+    ("What was the clue in the Red-Headed League?", "sherlock_holmes.txt"),
+    ("What did Gregor find himself transformed into?", "metamorphosis.txt"),
+]
+
+
+def post(url, payload, timeout):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, TimeoutError):
+        status = "timeout"
+    return status, time.perf_counter() - start
+
+
+def probe_page(base_url, stop, latencies):
+    """Keeps loading the GUI page while the load runs, to show the event loop stays free."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        with urllib.request.urlopen(base_url + "/", timeout=30) as response:
+            response.read()
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.2)
+
+
+def percentiles(values):
+    return " ".join(f"p{p}={np.percentile(values, p) * 1000:.0f}ms" for p in (50, 95, 99)) if values else "n/a"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the book server.")
+    parser.add_argument("--url", default=BASE_URL)
+    parser.add_argument("--endpoint", choices=["qa", "summarize"], default="qa")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--requests", type=int, default=64, help="Requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    url = f"{args.url}/{args.endpoint}"
+    for concurrency in args.concurrency:
+        # Unique questions and no_cache keep the answer cache out of it, so every request reaches the model
+        payloads = [{"question": f"{QUESTIONS[i % len(QUESTIONS)][0]} (request {concurrency}-{i})",
+                     "book_name": QUESTIONS[i % len(QUESTIONS)][1], "no_cache": True} for i in range(args.requests)]
+
+        stop = threading.Event()
+        page_latencies = []
+        prober = threading.Thread(target=probe_page, args=(args.url, stop, page_latencies), daemon=True)
+        prober.start()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(lambda payload: post(url, payload, args.timeout), payloads))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        prober.join()
+
+        ok = [latency for status, latency in results if status == 200]
+        statuses = {}
+        for status, _ in results:
+            statuses[status] = statuses.get(status, 0) + 1
+        print(f"concurrency {concurrency:>3} | {len(ok) / elapsed:6.2f} ok QPS | latency {percentiles(ok)} | "
+              f"statuses {statuses} | GUI page {percentiles(page_latencies)}")
+
+    with urllib.request.urlopen(args.url + "/stats", timeout=30) as response:
+        print(f"Server pool stats: {json.loads(response.read())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from vector_index import normalize
+
+# Answer caching
+EXACT_CACHE_SIZE = 2048  # Answers kept for exact (normalized) question matches
+SEMANTIC_CACHE_SIZE = 512  # Question embeddings compared against for near-duplicates
+CACHE_TTL = 3600  # Seconds an answer may be served from the cache
+SEMANTIC_THRESHOLD = 0.95  # Minimum cosine similarity between questions to reuse an answer
+LIBRARY_SCOPE = "library"  # Scope of questions asked across every book
+
+
+def normalize_question(question):
+    """Case, whitespace and trailing punctuation do not change the answer."""
+    return re.sub(r"\s+", " ", question).strip().rstrip("?!. ").lower()
+
+
+class AnswerCache:
+    """
+    Two-level cache of /qa results, scoped by book content hash (or LIBRARY_SCOPE).
+    The exact level is an LRU keyed on the normalized question and is checked before
+    any model work; the semantic level reuses an answer when the question embedding is
+    within SEMANTIC_THRESHOLD of a cached one. Entries expire after CACHE_TTL.
+    """
+
+    def __init__(self, exact_size=EXACT_CACHE_SIZE, semantic_size=SEMANTIC_CACHE_SIZE, ttl=CACHE_TTL,
+                 threshold=SEMANTIC_THRESHOLD):
+        self.exact_size = exact_size
+        self.semantic_size = semantic_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.exact = OrderedDict()  # (scope, question) -> (expires, result)
+        self.semantic = OrderedDict()  # (scope, question) -> (expires, unit embedding, result)
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expire(self, entries, now):
+        for key in [key for key, entry in entries.items() if entry[0] <= now]:
+            del entries[key]
+            self.evictions += 1
+
+    def get_exact(self, scope, question):
+        key = (scope, normalize_question(question))
+        with self.lock:
+            entry = self.exact.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.exact.move_to_end(key)
+                self.exact_hits += 1
+                return entry[1]
+        return None
+
+    def get_similar(self, scope, embedding):
+        """Result of the most similar cached question in `scope`, if close enough; counts a miss otherwise."""
+        query = normalize(np.reshape(embedding, (1, -1)))[0]
+        with self.lock:
+            self._expire(self.semantic, time.monotonic())
+            keys = [key for key in self.semantic if key[0] == scope]
+            if keys:
+                similarities = np.stack([self.semantic[key][1] for key in keys]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self.semantic.move_to_end(keys[best])
+                    self.semantic_hits += 1
+                    return self.semantic[keys[best]][2]
+            self.misses += 1
+        return None
+
+    def put(self, scope, question, embedding, result):
+        key = (scope, normalize_question(question))
+        expires = time.monotonic() + self.ttl
+        vector = normalize(np.reshape(embedding, (1, -1)))[0]
+        with self.lock:
+            for entries, size, entry in ((self.exact, self.exact_size, (expires, result)),
+                                         (self.semantic, self.semantic_size, (expires, vector, result))):
+                entries[key] = entry
+                entries.move_to_end(key)
+                while len(entries) > size:
+                    entries.popitem(last=False)
+                    self.evictions += 1
+
+    def invalidate(self, scope=None):
+        """Drops answers about `scope` and every library-wide answer, whose sources may have changed."""
+        scopes = {scope, LIBRARY_SCOPE}
+        with self.lock:
+            for entries in (self.exact, self.semantic):
+                for key in [key for key in entries if key[0] in scopes]:
+                    del entries[key]
+
+    def stats(self):
+        with self.lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "exact_entries": len(self.exact),
+                "semantic_entries": len(self.semantic),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.exact_hits + self.semantic_hits) / lookups, 3) if lookups else 0.0,
+            }
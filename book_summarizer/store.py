@@ -0,0 +1,485 @@
+import fcntl
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from vector_index import INDEX_TYPE, effective_type, index_type_of, make_index, normalize, training_sample, tune
+
+INDEX_DIR = Path("models/index")
+COMPACT_DEAD_FRACTION = 0.25  # Share of vector rows left behind by replaced books that triggers a rewrite
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class BookStore:
+    """
+    Persistent library of indexed books under INDEX_DIR:
+    - chunks.db: SQLite tables of books and chunk text, so no text is held in memory
+    - vectors.f32: every normalized chunk embedding, appended in chunk-id order and memory-mapped;
+      rewritten as vectors.<n>.f32 without replaced books' rows once enough of them pile up
+    - library.index: FAISS inner-product index of type INDEX_TYPE whose ids are the chunk ids
+    - staging/: chunks and vectors of books a bulk index run has not finished, so it can resume
+    A book's chunks get consecutive ids, so they are one contiguous slice of the vectors.
+    Only one process may open a library at a time: the app and trainer.py each keep the
+    vectors mapped and the index in memory, and would overwrite each other's changes.
+    """
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.index_dir / "chunks.db"
+        self.index_path = self.index_dir / "library.index"
+        self.staging_dir = self.index_dir / "staging"
+        self.lock = threading.RLock()
+        # Held until the process exits
+        self.lock_file = open(self.index_dir / "store.lock", "a")
+        try:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.lock_file.close()
+            raise RuntimeError(f"{self.index_dir} is in use by another process (the app or trainer.py); stop it first.")
+
+        migrate = not self.db_path.exists() and (self.index_dir / "chunks.txt").exists()
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS books (
+                id INTEGER PRIMARY KEY,
+                name TEXT UNIQUE NOT NULL,
+                sha256 TEXT,
+                first_chunk INTEGER NOT NULL,
+                chunk_count INTEGER NOT NULL,
+                added_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                book_id INTEGER NOT NULL REFERENCES books(id),
+                position INTEGER NOT NULL,
+                text TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS staged_books (
+                sha256 TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                chunker TEXT NOT NULL,
+                chunk_count INTEGER NOT NULL,
+                dim INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS staged_chunks (
+                sha256 TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (sha256, position)
+            );
+            CREATE INDEX IF NOT EXISTS chunks_book ON chunks(book_id);
+            CREATE INDEX IF NOT EXISTS books_sha256 ON books(sha256);
+        """)
+        self.vectors_path = self.index_dir / (self._meta("vectors_file") or "vectors.f32")
+        self.dim = self._meta("dim")
+        self.dim = int(self.dim) if self.dim else None
+        self.vectors = None
+        self.index = None
+        if migrate:
+            self._migrate_legacy()
+        self._load()
+
+    def _meta(self, key, value=None):
+        if value is None:
+            row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _stored_rows(self):
+        if not self.dim or not self.vectors_path.exists():
+            return 0
+        return self.vectors_path.stat().st_size // (4 * self.dim)
+
+    def _map_vectors(self):
+        rows = self._stored_rows()
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim)) if rows else None
+
+    def _live_ids(self):
+        """Chunk ids of every stored book, i.e. the rows of vectors.f32 still in use."""
+        ranges = self.db.execute("SELECT first_chunk, chunk_count FROM books ORDER BY first_chunk").fetchall()
+        if not ranges:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(first, first + count, dtype=np.int64) for first, count in ranges])
+
+    def _normalize_stored_vectors(self):
+        """Stores written before vectors were normalized are converted in place, once."""
+        rows = self._stored_rows()
+        if rows:
+            print("🔧 Normalizing stored embeddings for inner-product search...")
+            vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+            for start in range(0, rows, 65536):
+                vectors[start:start + 65536] = normalize(vectors[start:start + 65536])
+            vectors.flush()
+            del vectors
+        self._meta("normalized", 1)
+        self.db.commit()
+
+    def build_index(self, index_type=None):
+        """(Re)builds the index (INDEX_TYPE by default) from the stored vectors, training it first when needed."""
+        index_type = index_type or INDEX_TYPE
+        ids = self._live_ids()
+        kind = effective_type(index_type, len(ids))
+        index = make_index(kind, self.dim, len(ids))
+        if not index.is_trained:
+            print(f"🔧 Training the {kind} index ({index.nlist} lists) on {len(ids)} vectors...")
+            index.train(training_sample(self.vectors, ids, index.nlist))
+        for start in range(0, len(ids), 65536):
+            batch = ids[start:start + 65536]
+            index.add_with_ids(np.ascontiguousarray(self.vectors[batch]), batch)
+        self.index = tune(index)
+        self._save_index()
+        print(f"✅ Built a {kind} index over {index.ntotal} vectors.")
+
+    def _load(self):
+        """Maps the vectors and loads the index, rebuilding it if it is missing, stale or of another type."""
+        if not self.dim:
+            return
+        if self._meta("normalized") != "1":
+            self._normalize_stored_vectors()
+        # Left by a compaction that never committed, or by one that did
+        for path in self.index_dir.glob("vectors*.f32"):
+            if path != self.vectors_path:
+                path.unlink()
+        # Rows appended by an upload that never committed are dropped
+        committed = self.db.execute("SELECT COALESCE(MAX(first_chunk + chunk_count), 0) FROM books").fetchone()[0]
+        if self._stored_rows() > committed:
+            os.truncate(self.vectors_path, committed * 4 * self.dim)
+        self._map_vectors()
+
+        chunk_count = self.db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        if self.index_path.exists():
+            self.index = tune(faiss.read_index(str(self.index_path)))
+        if self.index is None or self.index.ntotal != chunk_count \
+                or index_type_of(self.index) != effective_type(INDEX_TYPE, chunk_count):
+            self.build_index()
+
+    def _save_index(self):
+        temporary_path = str(self.index_path) + ".tmp"
+        faiss.write_index(self.index, temporary_path)
+        os.replace(temporary_path, self.index_path)
+
+    def _migrate_legacy(self):
+        """Imports trainer.py's old books.index + chunks.txt without re-embedding anything."""
+        legacy_index = faiss.read_index(str(self.index_dir / "books.index"))
+        with open(self.index_dir / "chunks.txt", encoding="utf-8") as f:
+            lines = [line.rstrip("\n") for line in f]
+        vectors = legacy_index.reconstruct_n(0, legacy_index.ntotal)
+
+        books = {}
+        for row, line in enumerate(lines):
+            name, _, text = line.partition(" | ")
+            books.setdefault(name, []).append((row, text))
+        print(f"📦 Migrating {len(lines)} legacy chunks from {len(books)} books...")
+        for name, rows in books.items():
+            # The hash is only known when the original file is still in the data folder
+            book_path = Path("data") / name
+            sha256 = content_hash(book_path.read_text(encoding="utf-8")) if book_path.exists() else None
+            self._insert(name, sha256, [text for _, text in rows], vectors[[row for row, _ in rows]])
+
+    def _append_vectors(self, embeddings):
+        """Appends normalized embeddings to vectors.f32 (durably, before any row refers to them); returns the first id."""
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+            self._meta("dim", self.dim)
+            self._meta("normalized", 1)
+        first_chunk = self._stored_rows()
+        with open(self.vectors_path, "ab") as f:
+            for start in range(0, len(embeddings), 65536):
+                f.write(np.ascontiguousarray(embeddings[start:start + 65536]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        return first_chunk
+
+    def _add_book_row(self, name, sha256, first_chunk, chunk_count):
+        cursor = self.db.execute(
+            "INSERT INTO books (name, sha256, first_chunk, chunk_count, added_at) VALUES (?, ?, ?, ?, ?)",
+            (name, sha256, first_chunk, chunk_count, time.time())
+        )
+        return cursor.lastrowid
+
+    def _index_rows(self, first_chunk, chunk_count):
+        """Maps newly committed vectors and adds them to the live index."""
+        self._map_vectors()
+        if self.index is not None and self.index.is_trained:
+            for start in range(first_chunk, first_chunk + chunk_count, 65536):
+                end = min(start + 65536, first_chunk + chunk_count)
+                self.index.add_with_ids(np.ascontiguousarray(self.vectors[start:end]), np.arange(start, end, dtype=np.int64))
+
+    def _insert(self, name, sha256, chunks, embeddings):
+        """Appends a book's embeddings and rows; the SQLite commit happens last, so a crash leaves no half book."""
+        embeddings = normalize(embeddings)
+        first_chunk = self._append_vectors(embeddings)
+        book_id = self._add_book_row(name, sha256, first_chunk, len(chunks))
+        self.db.executemany(
+            "INSERT INTO chunks (id, book_id, position, text) VALUES (?, ?, ?, ?)",
+            [(first_chunk + position, book_id, position, text) for position, text in enumerate(chunks)]
+        )
+        self.db.commit()
+        self._index_rows(first_chunk, len(chunks))
+        return book_id
+
+    def _compact(self):
+        """Rewrites the vectors without the rows of replaced books and renumbers the chunks to match."""
+        ranges = self.db.execute("SELECT id, first_chunk, chunk_count FROM books ORDER BY first_chunk").fetchall()
+        generation = int(self._meta("vectors_generation") or 0) + 1
+        new_path = self.index_dir / f"vectors.{generation}.f32"
+        print(f"🔧 Compacting {self._stored_rows()} stored vectors to {sum(r[2] for r in ranges)}...")
+        with open(new_path, "wb") as f:
+            for _, first_chunk, chunk_count in ranges:
+                for start in range(first_chunk, first_chunk + chunk_count, 65536):
+                    end = min(start + 65536, first_chunk + chunk_count)
+                    f.write(np.ascontiguousarray(self.vectors[start:end]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Ids go through negative values first, so no two rows share an id mid-update
+        offset = 0
+        for book_id, first_chunk, chunk_count in ranges:
+            self.db.execute("UPDATE chunks SET id = -1 - (id - ?) WHERE book_id = ?", (first_chunk - offset, book_id))
+            self.db.execute("UPDATE books SET first_chunk = ? WHERE id = ?", (offset, book_id))
+            offset += chunk_count
+        self.db.execute("UPDATE chunks SET id = -1 - id")
+        self._meta("vectors_file", new_path.name)
+        self._meta("vectors_generation", generation)
+        # This commit is the switch to the new file; a crash before it keeps the old one
+        self.db.commit()
+        old_path, self.vectors_path, self.vectors = self.vectors_path, new_path, None
+        old_path.unlink(missing_ok=True)
+        self._map_vectors()
+
+    def _refresh_index(self):
+        """
+        Compacts the vectors once too many rows are dead (chunk ids change, so the index is rebuilt).
+        Otherwise rebuilds when there is no index yet, or the library just grew enough to train an
+        IVF index, and saves it when not.
+        """
+        count = self.db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        stored = self._stored_rows()
+        if stored and (stored - count) / stored > COMPACT_DEAD_FRACTION:
+            self._compact()
+            self.build_index()
+        elif self.index is None or index_type_of(self.index) != effective_type(INDEX_TYPE, count):
+            self.build_index()
+        else:
+            self._save_index()
+
+    def _remove(self, book_id):
+        first_chunk, chunk_count = self.db.execute(
+            "SELECT first_chunk, chunk_count FROM books WHERE id = ?", (book_id,)
+        ).fetchone()
+        self.db.execute("DELETE FROM chunks WHERE book_id = ?", (book_id,))
+        self.db.execute("DELETE FROM books WHERE id = ?", (book_id,))
+        self.db.commit()
+        # The old vectors stay in vectors.f32 but are no longer referenced
+        if self.index is not None:
+            try:
+                self.index.remove_ids(faiss.IDSelectorRange(first_chunk, first_chunk + chunk_count))
+            except RuntimeError:
+                self.index = None  # HNSW cannot remove vectors; add_book rebuilds it
+
+    def find_book(self, name=None, sha256=None):
+        column, value = ("name", name) if name is not None else ("sha256", sha256)
+        row = self.db.execute(
+            f"SELECT id, name, sha256, first_chunk, chunk_count FROM books WHERE {column} = ?", (value,)
+        ).fetchone()
+        return dict(zip(["id", "name", "sha256", "first_chunk", "chunk_count"], row)) if row else None
+
+    def copy_book(self, name, sha256, refresh_index=True):
+        """
+        Stores `name` with the chunks and vectors of a stored book of the same content
+        (same SHA-256), replacing an older version of `name`. Returns the new book, or
+        None when no stored book has that content.
+        """
+        with self.lock:
+            source = self.find_book(sha256=sha256)
+            if source is None:
+                return None
+            previous = self.find_book(name=name)
+            if previous and previous["id"] == source["id"]:
+                return previous
+            if previous:
+                self._remove(previous["id"])
+            first_chunk = self._append_vectors(
+                self.vectors[source["first_chunk"]:source["first_chunk"] + source["chunk_count"]]
+            )
+            book_id = self._add_book_row(name, sha256, first_chunk, source["chunk_count"])
+            self.db.execute(
+                "INSERT INTO chunks (id, book_id, position, text) "
+                "SELECT ? + position, ?, position, text FROM chunks WHERE book_id = ?",
+                (first_chunk, book_id, source["id"])
+            )
+            self.db.commit()
+            self._index_rows(first_chunk, source["chunk_count"])
+            if refresh_index:
+                self._refresh_index()
+            return self.find_book(name=name)
+
+    def add_book(self, name, content, encode, chunker):
+        """
+        Chunks (with `chunker`), embeds and stores a book. Content already in the library (same SHA-256) is not
+        embedded again, only copied when it is stored under another name; a new version of an existing name
+        replaces the old one. Returns (book, whether it was embedded).
+        """
+        sha256 = content_hash(content)
+        with self.lock:
+            previous = self.find_book(name=name)
+            if previous and previous["sha256"] == sha256:
+                return previous, False
+            copy = self.copy_book(name, sha256)
+            if copy:
+                return copy, False
+
+        chunks = list(chunker.chunks(content))
+        if not chunks:
+            raise ValueError(f"{name} has no text")
+        embeddings = encode(chunks)
+
+        with self.lock:
+            previous = self.find_book(name=name)
+            if previous:
+                self._remove(previous["id"])
+            self._insert(name, sha256, chunks, embeddings)
+            self._refresh_index()
+            return self.find_book(name=name), True
+
+    def _staging_path(self, sha256):
+        return self.staging_dir / f"{sha256}.f32"
+
+    def staged_progress(self, name, sha256, chunker_key):
+        """
+        Chunks of a book already staged by an interrupted bulk run with the same chunker
+        settings; any other stage of the book (older content or chunker) is discarded.
+        """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT chunker, chunk_count, dim FROM staged_books WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+            for (stale,) in self.db.execute("SELECT sha256 FROM staged_books WHERE name = ? AND sha256 != ?",
+                                            (name, sha256)).fetchall():
+                self.discard_staged(stale)
+            if row and row[0] == chunker_key:
+                # Vectors staged by a batch whose rows never committed are dropped
+                path = self._staging_path(sha256)
+                if path.exists():
+                    os.truncate(path, row[1] * 4 * (row[2] or 0))
+                return row[1]
+            self.discard_staged(sha256)
+            self.db.execute("INSERT INTO staged_books (sha256, name, chunker, chunk_count) VALUES (?, ?, ?, 0)",
+                            (sha256, name, chunker_key))
+            self.db.commit()
+            return 0
+
+    def stage_chunks(self, sha256, chunks, embeddings):
+        """Appends one batch of a book's chunks to its stage; after the commit the batch survives a crash."""
+        embeddings = normalize(embeddings)
+        self.staging_dir.mkdir(exist_ok=True)
+        with self.lock:
+            start = self.db.execute("SELECT chunk_count FROM staged_books WHERE sha256 = ?", (sha256,)).fetchone()[0]
+            with open(self._staging_path(sha256), "ab") as f:
+                f.write(embeddings.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            self.db.executemany(
+                "INSERT OR REPLACE INTO staged_chunks (sha256, position, text) VALUES (?, ?, ?)",
+                [(sha256, start + offset, text) for offset, text in enumerate(chunks)]
+            )
+            self.db.execute("UPDATE staged_books SET chunk_count = ?, dim = ? WHERE sha256 = ?",
+                            (start + len(chunks), embeddings.shape[1], sha256))
+            self.db.commit()
+            return start + len(chunks)
+
+    def commit_staged(self, sha256, refresh_index=True):
+        """
+        Moves a fully staged book into the library, replacing a book of the same name.
+        With refresh_index=False the index is only extended in memory; call refresh_index()
+        once after a bulk run instead of saving it after every book.
+        """
+        with self.lock:
+            name, chunk_count, dim = self.db.execute(
+                "SELECT name, chunk_count, dim FROM staged_books WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+            if not chunk_count:
+                self.discard_staged(sha256)
+                raise ValueError(f"{name} has no text")
+            previous = self.find_book(name=name)
+            if previous:
+                self._remove(previous["id"])
+            staged = np.memmap(self._staging_path(sha256), dtype=np.float32, mode="r", shape=(chunk_count, dim))
+            first_chunk = self._append_vectors(staged)
+            del staged
+            book_id = self._add_book_row(name, sha256, first_chunk, chunk_count)
+            self.db.execute(
+                "INSERT INTO chunks (id, book_id, position, text) "
+                "SELECT ? + position, ?, position, text FROM staged_chunks WHERE sha256 = ?",
+                (first_chunk, book_id, sha256)
+            )
+            self.db.execute("DELETE FROM staged_chunks WHERE sha256 = ?", (sha256,))
+            self.db.execute("DELETE FROM staged_books WHERE sha256 = ?", (sha256,))
+            self.db.commit()
+            self._staging_path(sha256).unlink(missing_ok=True)
+            self._index_rows(first_chunk, chunk_count)
+            if refresh_index:
+                self._refresh_index()
+            return self.find_book(name=name)
+
+    def refresh_index(self):
+        with self.lock:
+            if self.dim:
+                self._refresh_index()
+
+    def discard_staged(self, sha256):
+        with self.lock:
+            self.db.execute("DELETE FROM staged_chunks WHERE sha256 = ?", (sha256,))
+            self.db.execute("DELETE FROM staged_books WHERE sha256 = ?", (sha256,))
+            self.db.commit()
+            self._staging_path(sha256).unlink(missing_ok=True)
+
+    def search(self, query_embeddings, k, book=None):
+        """
+        Top-k chunk ids and cosine similarities per query. With a book, the exact search
+        only scans that book's slice of the memory-mapped vectors.
+        """
+        query_embeddings = normalize(query_embeddings)
+        with self.lock:
+            if self.index is None or self.index.ntotal == 0:
+                return np.empty((len(query_embeddings), 0)), np.empty((len(query_embeddings), 0), dtype=np.int64)
+            if book is None:
+                return self.index.search(query_embeddings, min(k, self.index.ntotal))
+            vectors = self.vectors[book["first_chunk"]:book["first_chunk"] + book["chunk_count"]]
+
+        similarities, rows = faiss.knn(
+            query_embeddings, np.ascontiguousarray(vectors), min(k, len(vectors)), metric=faiss.METRIC_INNER_PRODUCT
+        )
+        return similarities, rows + book["first_chunk"]
+
+    def passages(self, ids):
+        """Book name, position and text of the given chunk ids, in the same order."""
+        ids = [int(i) for i in ids if i >= 0]
+        with self.lock:
+            rows = {row[0]: row for row in self.db.execute(
+                f"SELECT chunks.id, books.name, chunks.position, chunks.text FROM chunks "
+                f"JOIN books ON books.id = chunks.book_id WHERE chunks.id IN ({','.join('?' * len(ids))})", ids
+            )} if ids else {}
+        return [dict(zip(["id", "book", "position", "text"], rows[i])) for i in ids if i in rows]
+
+    def book_chunks(self, book, limit=None):
+        """A book's chunk text in reading order."""
+        with self.lock:
+            return [row[0] for row in self.db.execute(
+                "SELECT text FROM chunks WHERE book_id = ? ORDER BY position LIMIT ?", (book["id"], limit or -1)
+            )]
+
+    def books(self):
+        with self.lock:
+            return [row[0] for row in self.db.execute("SELECT name FROM books ORDER BY name")]
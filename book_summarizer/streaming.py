@@ -0,0 +1,92 @@
+import asyncio
+import json
+import queue
+import threading
+
+import torch
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+
+from workers import REQUEST_TIMEOUT
+
+# Streaming
+# Seconds a stream waits for the next token; streams queue behind batches and other streams on the
+# model thread, so this is longer than a pooled request may take
+TOKEN_TIMEOUT = 2 * REQUEST_TIMEOUT
+
+
+class Cancelled(StoppingCriteria):
+    """Stops a generation once `event` is set, e.g. because the client disconnected."""
+
+    def __init__(self, event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+
+def _generate(pipe, prompt, streamer, cancelled, generate_kwargs):
+    if cancelled.is_set():
+        return
+    inputs = pipe.tokenizer(prompt, return_tensors="pt", truncation=True)
+    pipe.model.generate(**inputs, streamer=streamer, stopping_criteria=StoppingCriteriaList([Cancelled(cancelled)]),
+                        **generate_kwargs)
+
+
+async def stream_generation(generator, pipe, prompt, **generate_kwargs):
+    """
+    Text pieces of one generation as soon as they are decoded. It runs on the batcher's
+    model thread, between batches, so streamed and batched prompts never drive the model
+    at once. Closing the iterator (the client went away) stops the generation.
+    """
+    streamer = TextIteratorStreamer(pipe.tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=TOKEN_TIMEOUT)
+    cancelled = threading.Event()
+    future = generator.run_exclusive(lambda: _generate(pipe, prompt, streamer, cancelled, generate_kwargs))
+    # Ends the stream also when generation fails or is skipped; an extra end is ignored
+    future.add_done_callback(lambda _: streamer.end())
+    try:
+        while (piece := await asyncio.to_thread(next, streamer, None)) is not None:
+            if piece:
+                yield piece
+    except queue.Empty:
+        raise HTTPException(status_code=504, detail=f"No token generated within {TOKEN_TIMEOUT}s.")
+    finally:
+        cancelled.set()
+    await asyncio.wrap_future(future)
+
+
+async def _sse(events, release):
+    try:
+        async for event in events:
+            yield f"data: {json.dumps(event)}\n\n"
+    except HTTPException as e:
+        # The status line is already sent, so errors become the last event
+        yield f"data: {json.dumps({'error': e.detail})}\n\n"
+    except Exception as e:
+        yield f"data: {json.dumps({'error': str(e) or type(e).__name__})}\n\n"
+    finally:
+        release()
+
+
+def event_stream(model_pool, events):
+    """
+    Server-sent events response for an async iterator of dicts. A pool slot is taken
+    before the response starts, so a full pool still answers 429, and is held until the
+    stream ends; `events` runs its pool work with reserved=True.
+    """
+    model_pool.reserve()
+    lock = threading.Lock()
+    released = []
+
+    def release():
+        # Runs when the stream ends and again as the background task, which also covers a client gone before it started
+        with lock:
+            if released:
+                return
+            released.append(True)
+        model_pool.release()
+
+    return StreamingResponse(_sse(events, release), media_type="text/event-stream", background=BackgroundTask(release),
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+from store import INDEX_DIR
+
+# Generation settings per step
+MAP_MAX_LENGTH = 60  # Summary of one chunk
+REDUCE_MAX_LENGTH = 150  # Summary of a group of summaries
+FINAL_MAX_LENGTH = 300
+FINAL_SETTINGS = {"max_length": FINAL_MAX_LENGTH, "repetition_penalty": 2.0}
+REDUCE_PROMPT = "Summarize these points: "
+# flan-t5 reads 512 tokens; each reduce group is packed to stay under this, prompt included
+REDUCE_TOKEN_BUDGET = 480
+
+
+class SummaryCache:
+    """Persistent generated text keyed by a hash of the model, prompt and settings, shared across books."""
+
+    def __init__(self, path=INDEX_DIR / "summaries.db"):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, text TEXT NOT NULL)")
+        self.lock = threading.Lock()
+
+    def get_many(self, keys):
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT key, text FROM summaries WHERE key IN ({','.join('?' * len(keys))})", keys
+            ).fetchall() if keys else []
+        return dict(rows)
+
+    def put(self, key, text):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO summaries (key, text) VALUES (?, ?)", (key, text))
+            self.db.commit()
+
+
+class MapReduceSummarizer:
+    """
+    Summarizes a whole book: every chunk is summarized (map), then the summaries are
+    packed into token-budgeted groups and summarized again (reduce) until one group
+    is left. Every generated text is cached, so re-summarizing a book, or any book
+    sharing chunks with it, only generates what is new.
+    """
+
+    def __init__(self, generator, tokenizer, cache, model_name):
+        self.generator = generator
+        self.tokenizer = tokenizer
+        self.cache = cache
+        self.model_name = model_name
+
+    def _key(self, prompt, settings):
+        payload = json.dumps([self.model_name, prompt, sorted(settings.items())])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _generate_cached(self, prompts, stats, **settings):
+        """Generated text per prompt; cache misses are submitted together so they batch, and cached as they finish."""
+        keys = [self._key(prompt, settings) for prompt in prompts]
+        results = self.cache.get_many(keys)
+        stats["cached"] += sum(key in results for key in keys)
+        futures = {key: self.generator.submit(prompt, **settings) for key, prompt in zip(keys, prompts) if key not in results}
+        stats["generated"] += len(futures)
+        for key, future in futures.items():
+            results[key] = future.result()
+            self.cache.put(key, results[key])
+        return [results[key] for key in keys]
+
+    def _group(self, texts):
+        """Packs consecutive texts into groups whose reduce prompt fits REDUCE_TOKEN_BUDGET."""
+        budget = REDUCE_TOKEN_BUDGET - len(self.tokenizer(REDUCE_PROMPT).input_ids)
+        lengths = [len(ids) + 1 for ids in self.tokenizer(texts, add_special_tokens=False).input_ids]
+        groups, current, used = [], [], 0
+        for text, length in zip(texts, lengths):
+            if current and used + length > budget:
+                groups.append(current)
+                current, used = [], 0
+            current.append(text)
+            used += length
+        groups.append(current)
+        return groups
+
+    def cached(self, prompt, **settings):
+        """Previously generated text for `prompt`, or None; used when the final step is streamed instead."""
+        key = self._key(prompt, settings)
+        return self.cache.get_many([key]).get(key)
+
+    def remember(self, prompt, text, **settings):
+        self.cache.put(self._key(prompt, settings), text)
+
+    def reduce(self, chunks):
+        """Maps and reduces until the partial summaries fit one final prompt; returns it and how much work it took."""
+        stats = {"chunks": len(chunks), "levels": 0, "cached": 0, "generated": 0}
+        partials = self._generate_cached([f"summarize: {c}" for c in chunks], stats, max_length=MAP_MAX_LENGTH)
+        while True:
+            groups = self._group(partials)
+            stats["levels"] += 1
+            if len(groups) == 1:
+                return REDUCE_PROMPT + " ".join(groups[0]), stats
+            # Each reduced text is at most REDUCE_MAX_LENGTH tokens, so several fit per group and the levels shrink
+            partials = self._generate_cached(
+                [REDUCE_PROMPT + " ".join(group) for group in groups], stats,
+                max_length=REDUCE_MAX_LENGTH, repetition_penalty=2.0
+            )
+
+    def summarize(self, chunks):
+        """Returns the book summary and how much work it took."""
+        prompt, stats = self.reduce(chunks)
+        return self._generate_cached([prompt], stats, **FINAL_SETTINGS)[0], stats
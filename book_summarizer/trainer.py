@@ -1,47 +1,126 @@
+import argparse
+import hashlib
+import itertools
 import os
+import time
 from pathlib import Path
 from sentence_transformers import SentenceTransformer
-import faiss
-import numpy as np
+from chunker import Chunker
+from store import INDEX_DIR, BookStore
 
 DATA_DIR = Path("data")
-INDEX_DIR = Path("models/index")
+
+# Bulk indexing
+BATCH_CHUNKS = 1024  # Chunks embedded and checkpointed together
+ENCODE_BATCH_SIZE = 64  # Chunks per encoder forward pass
+ENCODE_WORKERS = max(1, (os.cpu_count() or 1) // 4)  # Encoding processes; each one also runs several torch threads
+
+
+def file_hash(path):
+    """SHA-256 of the file, read in blocks; the same hash the store gives the book's text."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
 
 class IndexerWrapper:
-    def __init__(self):
+    """
+    Adds a folder of .txt books to the persistent library. Files are streamed through
+    the chunker and embedded in batches of `batch_chunks`, on a pool of encoding
+    processes when `workers` > 1. Every batch is checkpointed in the store's staging
+    area, so an interrupted run resumes at the batch it stopped in.
+    """
+
+    def __init__(self, workers=ENCODE_WORKERS, batch_chunks=BATCH_CHUNKS, encode_batch_size=ENCODE_BATCH_SIZE):
+        # Same persistent library the app serves from; opened first, as it fails while the app has it open
+        self.store = BookStore(INDEX_DIR)
         # Local model that turns text into numerical meaning
         self.encoder = SentenceTransformer('all-MiniLM-L6-v2')
-        INDEX_DIR.mkdir(parents=True, exist_ok=True)
-
-    def run(self):
-        all_chunks = []
-        book_files = list(DATA_DIR.glob("*.txt"))
-
-        for book_path in book_files:
-            print(f"Indexing {book_path.name}...")
-            with open(book_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # Split into chunks so the AI doesn't get overwhelmed
-                words = content.split()
-                chunks = [" ".join(words[i:i + 300]) for i in range(0, len(words), 300)]
-                for c in chunks:
-                    # We store the filename so the UI can filter by book
-                    all_chunks.append(f"{book_path.name} | {c}")
-
-        if not all_chunks:
+        # Same chunking as uploads through the app
+        self.chunker = Chunker(self.encoder.tokenizer)
+        self.workers = workers
+        self.batch_chunks = batch_chunks
+        self.encode_batch_size = encode_batch_size
+        self.pool = None
+
+    def encode(self, chunks):
+        if self.pool:
+            return self.encoder.encode_multi_process(chunks, self.pool, batch_size=self.encode_batch_size)
+        return self.encoder.encode(chunks, batch_size=self.encode_batch_size)
+
+    def index_file(self, book_path):
+        """Stages and commits one book; returns the number of chunks embedded in this run."""
+        sha256 = file_hash(book_path)
+        existing = self.store.find_book(name=book_path.name)
+        if existing and existing["sha256"] == sha256:
+            print(f"Already indexed {book_path.name}")
+            return 0
+        # Content already stored under another name is copied instead of embedded again
+        book = self.store.copy_book(book_path.name, sha256, refresh_index=False)
+        if book:
+            print(f"Indexed {book_path.name} ({book['chunk_count']} chunks, copied from a book with the same text)")
+            return 0
+
+        chunker_key = f"{self.chunker.max_tokens}/{self.chunker.overlap_tokens}"
+        done = start = self.store.staged_progress(book_path.name, sha256, chunker_key)
+        if done:
+            print(f"Resuming {book_path.name} after {done} chunks")
+        started = time.perf_counter()
+        with open(book_path, encoding="utf-8") as f:
+            # Chunking is deterministic, so the chunks staged before the interruption are skipped
+            chunks = itertools.islice(self.chunker.chunks(f), done, None)
+            while batch := list(itertools.islice(chunks, self.batch_chunks)):
+                done = self.store.stage_chunks(sha256, batch, self.encode(batch))
+                rate = (done - start) / (time.perf_counter() - started)
+                print(f"  {book_path.name}: {done} chunks ({rate:.0f} chunks/s)")
+
+        try:
+            book = self.store.commit_staged(sha256, refresh_index=False)
+        except ValueError:
+            print(f"Skipping {book_path.name}: no text.")
+            return 0
+        print(f"Indexed {book_path.name} ({book['chunk_count']} chunks)")
+        return done - start
+
+    def run(self, data_dir=DATA_DIR):
+        book_files = sorted(Path(data_dir).glob("*.txt"))
+        if not book_files:
             print("No text found in data folder!")
             return
 
-        # Create the searchable vector database
-        embeddings = self.encoder.encode([c.split("|")[1] for c in all_chunks])
-        dimension = embeddings.shape[1]
-        index = faiss.IndexFlatL2(dimension)
-        index.add(np.array(embeddings).astype('float32'))
-
-        # Save everything to the models volume
-        faiss.write_index(index, str(INDEX_DIR / "books.index"))
-        with open(INDEX_DIR / "chunks.txt", "w", encoding="utf-8") as f:
-            for chunk in all_chunks:
-                f.write(chunk.replace("\n", " ") + "\n")
-        print("Indexing complete.")
\ No newline at end of file
+        if self.workers > 1:
+            self.pool = self.encoder.start_multi_process_pool(["cpu"] * self.workers)
+        started = time.perf_counter()
+        embedded = 0
+        try:
+            for book_path in book_files:
+                embedded += self.index_file(book_path)
+        finally:
+            if self.pool:
+                self.encoder.stop_multi_process_pool(self.pool)
+                self.pool = None
+            # Saved (or rebuilt) once for the whole run instead of after every book
+            self.store.refresh_index()
+        elapsed = time.perf_counter() - started
+        print(f"Indexing complete: {embedded} chunks embedded in {elapsed:.1f}s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk, resumable indexing of a folder of .txt books.")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--workers", type=int, default=ENCODE_WORKERS, help="Encoding processes")
+    parser.add_argument("--batch-chunks", type=int, default=BATCH_CHUNKS, help="Chunks per checkpoint")
+    parser.add_argument("--encode-batch-size", type=int, default=ENCODE_BATCH_SIZE)
+    args = parser.parse_args()
+    try:
+        indexer = IndexerWrapper(args.workers, args.batch_chunks, args.encode_batch_size)
+    except RuntimeError as e:
+        # The library is open in the app; indexing alongside it would corrupt its view of the files
+        raise SystemExit(f"❌ {e}")
+    indexer.run(args.data_dir)
+
+
+if __name__ == "__main__":
+    main()
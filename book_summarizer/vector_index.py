@@ -0,0 +1,88 @@
+import math
+
+import faiss
+import numpy as np
+
+# Index type for the library: "flat" (exact), "ivf_flat", "hnsw" or "ivf_pq".
+# All of them search normalized embeddings by inner product, i.e. cosine similarity.
+INDEX_TYPE = "ivf_flat"
+# IVF types stay exact (flat) until the library has enough vectors to train the coarse quantizer
+MIN_TRAINING_VECTORS = 20_000
+
+# Build parameters
+IVF_MAX_LISTS = 16_384  # nlist grows as 4 * sqrt(n) up to this cap
+IVF_TRAINING_SAMPLES_PER_LIST = 64
+PQ_SUBQUANTIZERS = 48  # Bytes per vector for IVF-PQ; must divide the embedding dimension
+HNSW_NEIGHBORS = 32  # M
+HNSW_EF_CONSTRUCTION = 80
+
+# Search parameters (speed/recall trade-off)
+NPROBE = 32  # IVF lists visited per query
+EF_SEARCH = 64  # HNSW candidate list size
+
+
+def normalize(vectors):
+    """Float32 copy of `vectors` with unit-length rows, so inner product equals cosine similarity."""
+    vectors = np.array(vectors, dtype=np.float32, copy=True, order="C")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def ivf_lists(count):
+    return int(min(IVF_MAX_LISTS, max(1, 4 * math.sqrt(count))))
+
+
+def effective_type(index_type, count):
+    """The index type to build for `count` vectors: IVF types need enough vectors to train."""
+    if index_type in ("ivf_flat", "ivf_pq") and count < max(MIN_TRAINING_VECTORS, 39 * ivf_lists(count)):
+        return "flat"
+    return index_type
+
+
+def make_index(index_type, dim, count):
+    """
+    An empty inner-product index of `index_type` sized for `count` vectors, accepting
+    add_with_ids. IVF types still need train() before vectors are added.
+    """
+    metric = faiss.METRIC_INNER_PRODUCT
+    if index_type == "flat":
+        return faiss.IndexIDMap(faiss.IndexFlatIP(dim))
+    if index_type == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, HNSW_NEIGHBORS, metric)
+        hnsw.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        return faiss.IndexIDMap(hnsw)
+    nlist = ivf_lists(count)
+    if index_type == "ivf_flat":
+        return faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, metric)
+    if index_type == "ivf_pq":
+        return faiss.IndexIVFPQ(faiss.IndexFlatIP(dim), dim, nlist, PQ_SUBQUANTIZERS, 8, metric)
+    raise ValueError(f"Unknown index type: {index_type}")
+
+
+def training_sample(vectors, ids, nlist, seed=0):
+    """Rows of `vectors` (which may be memory-mapped) to train an IVF index with `nlist` lists."""
+    size = min(len(ids), IVF_TRAINING_SAMPLES_PER_LIST * nlist)
+    sample = np.sort(np.random.default_rng(seed).choice(ids, size=size, replace=False))
+    return np.ascontiguousarray(vectors[sample])
+
+
+def tune(index, nprobe=NPROBE, ef_search=EF_SEARCH):
+    """Applies the search-time parameters to whichever index type this is."""
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = ef_search
+    elif isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = nprobe
+    return index
+
+
+def index_type_of(index):
+    """Inverse of make_index, used to tell whether a saved index still matches the configuration."""
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else faiss.downcast_index(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(inner, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    return "flat"
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+# Model execution
+MODEL_WORKERS = 8  # Concurrent requests; their prompts meet in the generation batcher, which runs the model
+MAX_QUEUED = 16  # Requests allowed to wait for a worker before new ones get a 429
+REQUEST_TIMEOUT = 60  # Seconds a request may wait and run before it gets a 504
+SUMMARY_TIMEOUT = 900  # Whole-book summaries; work finished before a timeout stays cached
+
+
+class ModelPool:
+    """
+    Runs blocking model work on a bounded thread pool so the event loop keeps serving.
+    At most `workers` calls run at once and `max_queued` more wait; beyond that
+    requests are rejected with 429 instead of piling up.
+    """
+
+    def __init__(self, workers=MODEL_WORKERS, max_queued=MAX_QUEUED):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="model")
+        self.workers = workers
+        self.capacity = workers + max_queued
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def reserve(self):
+        """Takes a slot, or raises 429 when the pool is full; paired with release()."""
+        with self.lock:
+            if self.pending >= self.capacity:
+                self.rejected += 1
+                raise HTTPException(status_code=429, detail="Server busy, try again shortly.", headers={"Retry-After": "1"})
+            self.pending += 1
+
+    def release(self, _=None):
+        with self.lock:
+            self.pending -= 1
+            self.completed += 1
+
+    async def run(self, fn, *args, timeout=REQUEST_TIMEOUT, reserved=False):
+        """
+        Runs `fn` on the pool. With reserved=True the caller already holds a slot from
+        reserve() (a streamed response takes it before sending headers) and releases it.
+        """
+        if not reserved:
+            self.reserve()
+        future = self.executor.submit(self._before_deadline, time.monotonic() + timeout, fn, *args)
+        if not reserved:
+            # The slot is released when the work really ends, even if the caller stopped waiting
+            future.add_done_callback(self.release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            with self.lock:
+                self.timed_out += 1
+            raise HTTPException(status_code=504, detail=f"Request did not finish within {timeout}s.")
+
+    @staticmethod
+    def _before_deadline(deadline, fn, *args):
+        # Work whose caller already got a 504 while it sat in the queue is not started at all
+        if time.monotonic() > deadline:
+            raise TimeoutError("Expired in the queue")
+        return fn(*args)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "running": min(self.pending, self.workers),
+                "queued": max(0, self.pending - self.workers),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
@@ -0,0 +1,106 @@
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+
+# Paths
+data_dir = "fruits_preprocessed"
+cache_dir = "cache"
+results_path = "training_benchmark.csv"
+
+# Benchmark settings
+img_size = (128, 128)
+validation_split = 0.2
+epochs = 4  # The first epoch includes tracing/compilation and is left out of the speed
+seed = 42
+base_batch_size = 32
+base_learning_rate = 1e-3
+cpu_count = os.cpu_count() or 4
+
+# Each configuration runs in a fresh process: thread pools and the precision policy are fixed at startup
+CONFIGURATIONS = [
+    {"name": "baseline", "batch_size": 32},
+    {"name": "threads", "batch_size": 32, "intra_op_threads": cpu_count, "inter_op_threads": 2},
+    {"name": "xla", "batch_size": 32, "jit_compile": True},
+    {"name": "bfloat16", "batch_size": 32, "mixed_bfloat16": True},
+    {"name": "batch 128", "batch_size": 128},
+    {"name": "batch 256", "batch_size": 256},
+    {"name": "all", "batch_size": 128, "intra_op_threads": cpu_count, "inter_op_threads": 2,
+     "jit_compile": True, "mixed_bfloat16": True},
+]
+
+
+def run_configuration(config):
+    """Trains a fresh model with one configuration and returns its speed and final validation accuracy."""
+    import numpy as np
+    import tensorflow as tf
+
+    from input_pipeline import ThroughputLogger, load_datasets
+    from training_setup import build_model, configure_precision, configure_threads, scaled_learning_rate
+
+    configure_threads(config.get("intra_op_threads", 0), config.get("inter_op_threads", 0))
+    bfloat16 = configure_precision(config.get("mixed_bfloat16", False))
+    tf.keras.utils.set_random_seed(seed)
+
+    batch_size = config["batch_size"]
+    class_indices, train_data, val_data, train_size = load_datasets(
+        data_dir, img_size, batch_size, validation_split, cache_dir, seed=seed
+    )
+    learning_rate = scaled_learning_rate(base_learning_rate, batch_size, base_batch_size)
+    model = build_model(len(class_indices), img_size, learning_rate, config.get("jit_compile", False))
+
+    throughput = ThroughputLogger(train_size)
+    history = model.fit(train_data, validation_data=val_data, epochs=epochs, callbacks=[throughput], verbose=2)
+
+    images_per_second = float(np.mean(throughput.images_per_second[1:] or throughput.images_per_second))
+    return {
+        "name": config["name"],
+        "batch_size": batch_size,
+        "learning_rate": learning_rate,
+        "bfloat16": bfloat16,
+        "steps_per_second": images_per_second / batch_size,
+        "images_per_second": images_per_second,
+        "val_accuracy": float(history.history["val_accuracy"][-1]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark training speed and accuracy per performance setting.")
+    parser.add_argument("--config", help=argparse.SUPPRESS)  # Set when running one configuration in a child process
+    args = parser.parse_args()
+
+    if args.config:
+        print("RESULT " + json.dumps(run_configuration(json.loads(args.config))))
+        return
+
+    results = []
+    for config in CONFIGURATIONS:
+        print(f"--- {config['name']} ---", flush=True)
+        completed = subprocess.run(
+            [sys.executable, __file__, "--config", json.dumps(config)], capture_output=True, text=True
+        )
+        lines = [line for line in completed.stdout.splitlines() if line.startswith("RESULT ")]
+        if completed.returncode or not lines:
+            print(f"Configuration '{config['name']}' failed:\n{completed.stderr[-2000:]}")
+            continue
+        results.append(json.loads(lines[-1][len("RESULT "):]))
+
+    if not results:
+        return
+    print(f"\n{'configuration':>14} | {'batch':>5} | {'lr':>8} | {'bf16':>5} | {'steps/s':>8} | {'images/s':>9} | {'val acc':>7}")
+    for result in results:
+        print(f"{result['name']:>14} | {result['batch_size']:>5} | {result['learning_rate']:>8.5f} | "
+              f"{str(result['bfloat16']):>5} | {result['steps_per_second']:>8.1f} | "
+              f"{result['images_per_second']:>9.0f} | {result['val_accuracy']:>7.3f}")
+
+    with open(results_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+    print(f"Results saved to {results_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import json
+import os
+import random
+
+import numpy as np
+import tensorflow as tf
+from sklearn.metrics import accuracy_score, classification_report
+
+from input_pipeline import list_images
+from predict_lite import LiteClassifier, iter_labelled_batches
+from preprocess import load_image, load_manifest, open_shards, split_entries
+
+# Paths
+model_path = "apple_classifier.h5"
+lite_model_path = "apple_classifier_int8.tflite"
+data_dir = "fruits_preprocessed"  # Representative images come from the training split
+prediction_dir = "prediction"
+
+# Quantization
+img_size = (128, 128)
+validation_split = 0.2
+representative_samples = 300
+seed = 42
+
+
+def representative_images(data_dir):
+    """A seeded sample of training images, preprocessed like predict.py (pixels / 255)."""
+    rng = random.Random(seed)
+    manifest = load_manifest(data_dir)
+    if manifest:
+        entries = split_entries(manifest, "training")
+        shards = open_shards(data_dir, manifest)
+        for entry in rng.sample(entries, min(representative_samples, len(entries))):
+            yield shards[entry["shard"]][entry["index"]] / np.float32(255)
+        return
+
+    _, subsets = list_images(data_dir, validation_split)
+    paths = subsets["training"][0]
+    for path in rng.sample(paths, min(representative_samples, len(paths))):
+        yield load_image(path, img_size) / np.float32(255)
+
+
+def export_int8(model, output_path):
+    """Full-integer quantization: int8 weights and activations calibrated on training images, int8 input and output."""
+    def representative_dataset():
+        for image in representative_images(data_dir):
+            yield [image[np.newaxis]]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+    tflite_model = converter.convert()
+
+    with open(output_path, "wb") as f:
+        f.write(tflite_model)
+    print(f"Saved int8 TFLite model ({len(tflite_model) / 1e6:.2f} MB, "
+          f"float model {os.path.getsize(model_path) / 1e6:.2f} MB) to {output_path}")
+
+
+def compare(model, lite_model_path, class_indices_reversed):
+    """Classifies the prediction folder with both models and prints both reports and the accuracy delta."""
+    classifier = LiteClassifier(lite_model_path)
+    true_labels, float_labels, lite_labels = [], [], []
+    for labels, _, images in iter_labelled_batches(prediction_dir, img_size):
+        true_labels += labels
+        float_labels += [class_indices_reversed[int(i)] for i in np.argmax(model.predict_on_batch(images), axis=1)]
+        lite_labels += [class_indices_reversed[int(i)] for i in np.argmax(classifier.predict(images), axis=1)]
+
+    print("\n--- Classification Report (float) ---")
+    print(classification_report(true_labels, float_labels))
+    print("--- Classification Report (TFLite int8) ---")
+    print(classification_report(true_labels, lite_labels))
+
+    float_accuracy = accuracy_score(true_labels, float_labels)
+    lite_accuracy = accuracy_score(true_labels, lite_labels)
+    agreement = np.mean(np.array(float_labels) == np.array(lite_labels))
+    print(f"Accuracy: float {float_accuracy:.4f} | int8 {lite_accuracy:.4f} | delta {lite_accuracy - float_accuracy:+.4f} "
+          f"| predictions agreeing {agreement:.2%}")
+
+
+if __name__ == "__main__":
+    model = tf.keras.models.load_model(model_path)
+    export_int8(model, lite_model_path)
+
+    with open("class_indices.json", "r") as f:
+        class_indices = json.load(f)
+    if os.path.exists(prediction_dir):
+        compare(model, lite_model_path, {v: k for k, v in class_indices.items()})
+    else:
+        print(f"Prediction folder '{prediction_dir}' not found; skipping the accuracy comparison.")
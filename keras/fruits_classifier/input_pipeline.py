@@ -0,0 +1,197 @@
+import hashlib
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from prepare_predictions import holdout_exclusions
+from preprocess import IMAGE_EXTENSIONS, load_manifest, open_shards, split_entries
+from preprocess import load_image as load_image_with_pil
+
+AUTOTUNE = tf.data.AUTOTUNE
+# Formats tf.io.decode_image reads; the other IMAGE_EXTENSIONS (.ppm, .tif, .tiff) are decoded with PIL
+TF_DECODABLE_PATTERN = r".*\.(bmp|gif|jpe?g|png)"
+SHUFFLE_BUFFER = 1024  # Decoded images held for shuffling after the cache; bounds memory on large datasets
+
+
+def list_images(data_dir, validation_split):
+    """
+    Lists the images split exactly like flow_from_directory(validation_split=...):
+    classes are the sorted subfolders, and the first `validation_split` of every
+    class's sorted files are validation, the rest training. Images held out by
+    prepare_predictions.py are left out. Returns class_indices and a {subset: (paths, labels)} dict.
+    """
+    class_names = sorted(d for d in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, d)))
+    class_indices = {name: index for index, name in enumerate(class_names)}
+
+    excluded_paths, _ = holdout_exclusions(data_dir)
+    subsets = {"training": ([], []), "validation": ([], [])}
+    for name, index in class_indices.items():
+        files = []
+        for root, _, filenames in sorted(os.walk(os.path.join(data_dir, name)), key=lambda entry: entry[0]):
+            files += [
+                os.path.join(root, f) for f in sorted(filenames)
+                if f.lower().endswith(IMAGE_EXTENSIONS) and os.path.relpath(os.path.join(root, f), data_dir) not in excluded_paths
+            ]
+
+        split_at = int(validation_split * len(files))
+        for subset, subset_files in (("validation", files[:split_at]), ("training", files[split_at:])):
+            subsets[subset][0].extend(subset_files)
+            subsets[subset][1].extend([index] * len(subset_files))
+
+    for subset, (paths, _) in subsets.items():
+        print(f"Found {len(paths)} {subset} images belonging to {len(class_indices)} classes.")
+    return class_indices, subsets
+
+
+def load_image(path, img_size):
+    """Decodes and resizes one image, keeping uint8 so the cache stays 4x smaller than float32."""
+    def decode_with_tf():
+        image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+        # Nearest-neighbour resize, like load_img's default interpolation
+        return tf.image.resize(image, img_size, method="nearest")
+
+    def decode_with_pil():
+        return tf.numpy_function(lambda p: load_image_with_pil(p.decode(), img_size), [path], tf.uint8)
+
+    is_tf_decodable = tf.strings.regex_full_match(tf.strings.lower(path), TF_DECODABLE_PATTERN)
+    image = tf.cond(is_tf_decodable, decode_with_tf, decode_with_pil)
+    image.set_shape(img_size + (3,))
+    return image
+
+
+def cache_file(cache_dir, subset, paths, img_size):
+    """Cache file named after the file list and size, so a changed dataset never reads a stale cache."""
+    digest = hashlib.sha1("\n".join(paths + [str(img_size)]).encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{subset}_{digest}")
+
+
+def build_dataset(paths, labels, num_classes, img_size, batch_size, shuffle=False, cache_path="", seed=None):
+    """
+    Parallel decode/resize, a cache of the decoded images (in memory when `cache_path`
+    is empty, on disk otherwise), then shuffle, batch and prefetch. The file order is
+    shuffled once before decoding, and every epoch reshuffles within a SHUFFLE_BUFFER
+    window, so only the cache ever holds the whole dataset.
+    Yields float32 images in [0, 255] and one-hot labels, like flow_from_directory.
+    """
+    if shuffle:
+        # Files are listed class by class; a bounded buffer alone would yield batches of one class
+        order = np.random.default_rng(seed).permutation(len(paths))
+        paths, labels = [paths[i] for i in order], [labels[i] for i in order]
+    dataset = tf.data.Dataset.from_tensor_slices((paths, labels))
+    dataset = dataset.map(lambda path, label: (load_image(path, img_size), label), num_parallel_calls=AUTOTUNE)
+    # Everything above runs once; later epochs start from the decoded images
+    dataset = dataset.cache(cache_path)
+    if shuffle:
+        dataset = dataset.shuffle(min(len(paths), SHUFFLE_BUFFER), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+    return to_model_inputs(dataset, num_classes)
+
+
+def build_shard_dataset(data_dir, manifest, subset, batch_size, shuffle=False, seed=None):
+    """
+    Reads one split of a preprocessed directory (see preprocess.py) straight from its
+    memory-mapped shards. Only the image positions are shuffled, and every batch is
+    gathered from the shards, so neither a decode nor a cache is needed.
+    """
+    entries = split_entries(manifest, subset)
+    shards = open_shards(data_dir, manifest)
+    shard_names = list(shards)
+    shard_ids = np.array([shard_names.index(entry["shard"]) for entry in entries], dtype=np.int64)
+    rows = np.array([entry["index"] for entry in entries], dtype=np.int64)
+    labels = tf.constant([entry["label"] for entry in entries], dtype=tf.int32)
+    image_shape = tuple(manifest["img_size"]) + (3,)
+
+    def gather(positions):
+        images = np.empty((len(positions),) + image_shape, dtype=np.uint8)
+        for i, position in enumerate(positions):
+            images[i] = shards[shard_names[shard_ids[position]]][rows[position]]
+        return images
+
+    def load_batch(positions):
+        images = tf.numpy_function(gather, [positions], tf.uint8)
+        images.set_shape((None,) + image_shape)
+        return images, tf.gather(labels, positions)
+
+    dataset = tf.data.Dataset.range(len(entries))
+    if shuffle:
+        dataset = dataset.shuffle(len(entries), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size).map(load_batch, num_parallel_calls=AUTOTUNE)
+    return to_model_inputs(dataset, len(manifest["class_indices"]))
+
+
+def to_model_inputs(dataset, num_classes):
+    """Casts batched uint8 images to float32 and one-hot encodes the labels, then prefetches."""
+    dataset = dataset.map(
+        lambda images, labels: (tf.cast(images, tf.float32), tf.one_hot(labels, num_classes)),
+        num_parallel_calls=AUTOTUNE
+    )
+    return dataset.prefetch(AUTOTUNE)
+
+
+def load_datasets(data_dir, img_size, batch_size, validation_split, cache_dir="", seed=None):
+    """
+    Training and validation datasets: read from preprocess.py shards when data_dir has a
+    manifest, otherwise decoded from the class folders. Returns class_indices, both
+    datasets and the number of training images.
+    """
+    manifest = load_manifest(data_dir)
+    if manifest:
+        # The manifest's split already follows the flow_from_directory rule
+        print(f"Reading {len(manifest['images'])} preprocessed images from {len(manifest['shards'])} shards "
+              f"(validation split {manifest['validation_split']}).")
+        train_data = build_shard_dataset(data_dir, manifest, "training", batch_size, shuffle=True, seed=seed)
+        val_data = build_shard_dataset(data_dir, manifest, "validation", batch_size)
+        return manifest["class_indices"], train_data, val_data, len(split_entries(manifest, "training"))
+
+    # Parallel decode/resize, cached after the first epoch
+    class_indices, subsets = list_images(data_dir, validation_split)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    train_paths, train_labels = subsets["training"]
+    val_paths, val_labels = subsets["validation"]
+    train_data = build_dataset(
+        train_paths, train_labels, len(class_indices), img_size, batch_size, shuffle=True, seed=seed,
+        cache_path=cache_file(cache_dir, "training", train_paths, img_size) if cache_dir else ""
+    )
+    val_data = build_dataset(
+        val_paths, val_labels, len(class_indices), img_size, batch_size,
+        cache_path=cache_file(cache_dir, "validation", val_paths, img_size) if cache_dir else ""
+    )
+    return class_indices, train_data, val_data, len(train_paths)
+
+
+def measure_throughput(dataset, description):
+    """Iterates the dataset once without a model and prints the images per second it can deliver."""
+    images = 0
+    start = time.perf_counter()
+    for batch, _ in dataset:
+        images += int(batch.shape[0])
+    elapsed = time.perf_counter() - start
+    print(f"{description}: {images} images in {elapsed:.1f}s ({images / elapsed:.0f} images/s)")
+    return images / elapsed
+
+
+class ThroughputLogger(tf.keras.callbacks.Callback):
+    """Prints the images per second of every training epoch, excluding the validation pass."""
+
+    def __init__(self, images_per_epoch):
+        super().__init__()
+        self.images_per_epoch = images_per_epoch
+        self.epoch_start = None
+        self.train_seconds = None
+        self.images_per_second = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.train_seconds = None
+        self.epoch_start = time.perf_counter()
+
+    def on_test_begin(self, logs=None):
+        if self.epoch_start is not None and self.train_seconds is None:
+            self.train_seconds = time.perf_counter() - self.epoch_start
+
+    def on_epoch_end(self, epoch, logs=None):
+        train_seconds = self.train_seconds or time.perf_counter() - self.epoch_start
+        self.images_per_second.append(self.images_per_epoch / train_seconds)
+        print(f"Epoch {epoch + 1}: {self.images_per_second[-1]:.0f} training images/s")
@@ -1,12 +1,89 @@
 import tensorflow as tf
 import numpy as np
 import os
+import csv
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from tensorflow.keras.preprocessing.image import load_img, img_to_array
 import matplotlib.pyplot as plt
 import sklearn
 from sklearn.metrics import classification_report, confusion_matrix
 import seaborn as sns
 import json
+from preprocess import load_manifest, open_shards
+
+# Paths
+prediction_dir = "prediction"  # Image folders, or shards built with `python preprocess.py prediction <dir> --validation-split 0`
+output_path = "predictions.csv"  # A .jsonl path writes one JSON object per image instead
+
+# Batching
+batch_size = 64
+decode_workers = os.cpu_count() or 4
+prefetch_batches = 2  # Batches decoded ahead of the one being predicted
+img_size = (128, 128)
+
+
+def load_image(img_path):
+    """Loads and preprocesses one image, or returns None if it cannot be read."""
+    try:
+        img = load_img(img_path, target_size=img_size)
+        return img_to_array(img) / 255.0
+    except Exception as e:
+        print(f"Error processing image {os.path.basename(img_path)}: {e}")
+        return None
+
+
+def iter_batches(items, executor):
+    """Decodes (category, path) items on the pool and yields them in order as fixed-size batches."""
+    pending = deque()
+    for start in range(0, len(items), batch_size):
+        chunk = items[start:start + batch_size]
+        pending.append((chunk, [executor.submit(load_image, path) for _, path in chunk]))
+        if len(pending) > prefetch_batches:
+            yield collect(*pending.popleft())
+    while pending:
+        yield collect(*pending.popleft())
+
+
+def collect(chunk, futures):
+    images = [future.result() for future in futures]
+    kept = [(item, image) for item, image in zip(chunk, images) if image is not None]
+    return [item for item, _ in kept], np.stack([image for _, image in kept]) if kept else None
+
+
+def iter_shard_batches(data_dir, manifest):
+    """Yields fixed-size batches straight from preprocessed shards, which need no decoding."""
+    shards = open_shards(data_dir, manifest)
+    class_names = {v: k for k, v in manifest["class_indices"].items()}
+    entries = manifest["images"]
+    for start in range(0, len(entries), batch_size):
+        chunk = entries[start:start + batch_size]
+        images = np.stack([shards[entry["shard"]][entry["index"]] for entry in chunk]).astype(np.float32) / 255.0
+        yield [(class_names[entry["label"]], entry["path"]) for entry in chunk], images
+
+
+class PredictionWriter:
+    """Appends predictions to a CSV or JSONL file as batches complete."""
+
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.jsonl = path.endswith(".jsonl")
+        if not self.jsonl:
+            self.csv = csv.writer(self.file)
+            self.csv.writerow(["image", "true_label", "predicted_label", "confidence"])
+
+    def write(self, rows):
+        for row in rows:
+            if self.jsonl:
+                self.file.write(json.dumps(dict(zip(["image", "true_label", "predicted_label", "confidence"], row))) + "\n")
+            else:
+                self.csv.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
 
 # Load Model
 model = tf.keras.models.load_model("apple_classifier.h5")
@@ -18,44 +95,63 @@ with open("class_indices.json", "r") as f:
 # Reverse the mapping of class_indices to get indices-to-classes
 class_indices_reversed = {v: k for k, v in class_indices.items()}
 
-# Paths
-prediction_dir = "prediction"
-
 # Ensure prediction folder exists
 if not os.path.exists(prediction_dir):
     raise FileNotFoundError(f"Prediction folder '{prediction_dir}' not found!")
 
+# Collect every image with its true label (the folder name), unless the folder holds shards
+manifest = load_manifest(prediction_dir)
+items = []
+if manifest:
+    print(f"Reading {len(manifest['images'])} preprocessed images from {len(manifest['shards'])} shards")
+else:
+    for category in sorted(os.listdir(prediction_dir)):
+        category_path = os.path.join(prediction_dir, category)
+        if os.path.isdir(category_path):
+            images = sorted(os.listdir(category_path))
+            print(f"Found {len(images)} images in '{category}'")
+            items += [(category, os.path.join(category_path, img_name)) for img_name in images]
+
 # Initialize containers for metrics
 true_labels = []
 predicted_labels = []
+timings = {"decode": 0.0, "predict": 0.0, "write": 0.0}
+
+# Classify images batch by batch: decoding runs on the pool while the model predicts
+writer = PredictionWriter(output_path)
+start = time.perf_counter()
+with ThreadPoolExecutor(max_workers=decode_workers) as executor:
+    batches = iter_shard_batches(prediction_dir, manifest) if manifest else iter_batches(items, executor)
+    while True:
+        stage_start = time.perf_counter()
+        batch = next(batches, None)
+        timings["decode"] += time.perf_counter() - stage_start  # Time spent waiting on decoding or shard reads
+        if batch is None:
+            break
+        batch_items, batch_images = batch
+        if batch_images is None:
+            continue
+
+        stage_start = time.perf_counter()
+        predictions = np.asarray(model.predict_on_batch(batch_images))
+        timings["predict"] += time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        predicted_indices = np.argmax(predictions, axis=1)
+        rows = []
+        for (category, img_path), predicted_index, scores in zip(batch_items, predicted_indices, predictions):
+            predicted_class = class_indices_reversed[int(predicted_index)]
+            true_labels.append(category)  # True label from folder name
+            predicted_labels.append(predicted_class)  # Predicted label
+            rows.append((os.path.basename(img_path), category, predicted_class, round(float(scores[predicted_index]), 6)))
+        writer.write(rows)
+        timings["write"] += time.perf_counter() - stage_start
+writer.close()
 
-# Classify images
-for category in os.listdir(prediction_dir):
-    category_path = os.path.join(prediction_dir, category)
-    if os.path.isdir(category_path):
-        print(f"Classifying images in '{category}'...")
-        for img_name in os.listdir(category_path):
-            img_path = os.path.join(category_path, img_name)
-            try:
-                # Load and preprocess the image
-                img = load_img(img_path, target_size=(128, 128))
-                img_array = img_to_array(img) / 255.0
-                img_array = np.expand_dims(img_array, axis=0)
-
-                # Predict
-                predictions = model.predict(img_array)
-                predicted_index = np.argmax(predictions[0])
-                predicted_class = class_indices_reversed[predicted_index]
-
-                # Record for metrics
-                true_labels.append(category)  # True label from folder name
-                predicted_labels.append(predicted_class)  # Predicted label
-
-                # Display prediction
-                print(f"Image: {img_name} | True: {category} | Predicted: {predicted_class}")
-
-            except Exception as e:
-                print(f"Error processing image {img_name}: {e}")
+elapsed = time.perf_counter() - start
+print(f"Classified {len(predicted_labels)} images in {elapsed:.2f}s ({len(predicted_labels) / elapsed:.1f} images/s)")
+print("Stage timing: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()))
+print(f"Predictions written to {output_path}")
 
 # Generate metrics
 print("\n--- Classification Report ---")
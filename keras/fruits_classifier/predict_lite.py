@@ -0,0 +1,145 @@
+import time
+
+start_time = time.perf_counter()
+
+import argparse
+import csv
+import json
+import os
+
+import numpy as np
+
+from preprocess import load_image, load_manifest, open_shards
+
+# Paths
+lite_model_path = "apple_classifier_int8.tflite"
+prediction_dir = "prediction"
+output_path = "predictions_lite.csv"
+
+# Inference
+img_size = (128, 128)
+batch_size = 64
+num_threads = os.cpu_count() or 4
+
+
+def _interpreter(model_path):
+    """Prefers the standalone tflite_runtime package, which starts without importing TensorFlow."""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        from tensorflow.lite import Interpreter
+    return Interpreter(model_path=model_path, num_threads=num_threads)
+
+
+class LiteClassifier:
+    """Runs the exported classifier on the TFLite interpreter, quantizing inputs and outputs as needed."""
+
+    def __init__(self, model_path):
+        self.interpreter = _interpreter(model_path)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.batch_size = int(self.input["shape"][0])
+
+    def predict(self, images):
+        """Class probabilities for a float32 batch preprocessed like predict.py (pixels / 255)."""
+        if len(images) != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input["index"], (len(images),) + tuple(self.input["shape"][1:]))
+            self.interpreter.allocate_tensors()
+            self.input = self.interpreter.get_input_details()[0]
+            self.output = self.interpreter.get_output_details()[0]
+            self.batch_size = len(images)
+
+        scale, zero_point = self.input["quantization"]
+        if scale:
+            info = np.iinfo(self.input["dtype"])
+            images = np.clip(np.round(images / scale + zero_point), info.min, info.max)
+        self.interpreter.set_tensor(self.input["index"], images.astype(self.input["dtype"]))
+        self.interpreter.invoke()
+
+        outputs = self.interpreter.get_tensor(self.output["index"])
+        scale, zero_point = self.output["quantization"]
+        if scale:
+            outputs = (outputs.astype(np.float32) - zero_point) * scale
+        return outputs
+
+
+def iter_labelled_batches(data_dir, size=img_size):
+    """
+    Yields (true labels, image names, images / 255) batches from a folder of class
+    subfolders, or from shards built by preprocess.py when the folder has a manifest.
+    """
+    manifest = load_manifest(data_dir)
+    if manifest:
+        shards = open_shards(data_dir, manifest)
+        class_names = {v: k for k, v in manifest["class_indices"].items()}
+        entries = manifest["images"]
+        for start in range(0, len(entries), batch_size):
+            chunk = entries[start:start + batch_size]
+            images = np.stack([shards[entry["shard"]][entry["index"]] for entry in chunk])
+            yield [class_names[entry["label"]] for entry in chunk], [entry["path"] for entry in chunk], images / np.float32(255)
+        return
+
+    items = []
+    for category in sorted(os.listdir(data_dir)):
+        category_path = os.path.join(data_dir, category)
+        if os.path.isdir(category_path):
+            items += [(category, os.path.join(category_path, name)) for name in sorted(os.listdir(category_path))]
+    for start in range(0, len(items), batch_size):
+        labels, names, images = [], [], []
+        for category, path in items[start:start + batch_size]:
+            try:
+                images.append(load_image(path, size))
+            except Exception as e:
+                print(f"Error processing image {os.path.basename(path)}: {e}")
+                continue
+            labels.append(category)
+            names.append(os.path.basename(path))
+        if images:
+            yield labels, names, np.stack(images) / np.float32(255)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify fruit images with the quantized TFLite model.")
+    parser.add_argument("images", nargs="*", help="Image files to classify (default: every image under prediction/)")
+    parser.add_argument("--model", default=lite_model_path)
+    args = parser.parse_args()
+
+    with open("class_indices.json", "r") as f:
+        class_indices = json.load(f)
+    class_indices_reversed = {v: k for k, v in class_indices.items()}
+
+    classifier = LiteClassifier(args.model)
+    print(f"Model ready in {time.perf_counter() - start_time:.2f}s")
+
+    if args.images:
+        images = np.stack([load_image(path, img_size) for path in args.images]) / np.float32(255)
+        for path, scores in zip(args.images, classifier.predict(images)):
+            print(f"Image: {os.path.basename(path)} | Predicted: {class_indices_reversed[int(np.argmax(scores))]} "
+                  f"({float(np.max(scores)):.3f})")
+        print(f"Total time {time.perf_counter() - start_time:.2f}s")
+        return
+
+    true_labels, predicted_labels = [], []
+    classify_start = time.perf_counter()
+    with open(output_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["image", "true_label", "predicted_label", "confidence"])
+        for labels, names, images in iter_labelled_batches(prediction_dir):
+            scores = classifier.predict(images)
+            predicted = [class_indices_reversed[int(index)] for index in np.argmax(scores, axis=1)]
+            writer.writerows(zip(names, labels, predicted, np.round(np.max(scores, axis=1), 6)))
+            true_labels += labels
+            predicted_labels += predicted
+    elapsed = time.perf_counter() - classify_start
+    print(f"Classified {len(predicted_labels)} images in {elapsed:.2f}s ({len(predicted_labels) / elapsed:.1f} images/s)")
+    print(f"Predictions written to {output_path}")
+
+    from sklearn.metrics import classification_report
+
+    print("\n--- Classification Report (TFLite int8) ---")
+    print(classification_report(true_labels, predicted_labels))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,135 @@
+import hashlib
+import json
 import os
-import random
 import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from preprocess import IMAGE_EXTENSIONS, file_hash
 
 # Paths
 data_dir = "fruits"
 prediction_dir = "prediction"
+HOLDOUT_MANIFEST = os.path.join(prediction_dir, "holdout.json")
+
+# Hold-out selection
+holdout_fraction = 0.02  # 2% of every category, at least one image
+seed = 42
+workers = os.cpu_count() or 4
+
+
+def link_file(source, target):
+    """Hard-links source to target, falling back to a reflink and then to a plain copy. Returns the method used."""
+    try:
+        os.link(source, target)
+        return "hardlink"
+    except OSError:
+        pass
+    if subprocess.run(["cp", "--reflink=always", source, target], capture_output=True).returncode == 0:
+        return "reflink"
+    shutil.copy2(source, target)
+    return "copy"
+
 
-# Ensure data exists
-if not os.path.exists(data_dir):
-    raise FileNotFoundError(f"Dataset folder '{data_dir}' not found!")
+def load_holdout(manifest_path=HOLDOUT_MANIFEST):
+    """The hold-out manifest written by this script, or None if there is none."""
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
 
-# Prepare predictions folder
-if not os.path.exists(prediction_dir):
-    os.makedirs(prediction_dir)
 
-# Move 2% of images to prediction folder
-for category in os.listdir(data_dir):
+def holdout_exclusions(source_dir, manifest_path=HOLDOUT_MANIFEST):
+    """Relative paths and content hashes of `source_dir` images held out for evaluation (empty sets if none)."""
+    holdout = load_holdout(manifest_path)
+    if not holdout or os.path.realpath(holdout["source_dir"]) != os.path.realpath(source_dir):
+        return set(), set()
+    paths = {path for files in holdout["categories"].values() for path in files}
+    return paths, set(holdout["hashes"])
+
+
+def prepare_category(category, previous_hashes):
+    """Hashes one category, picks its hold-out and links the picked files into the prediction folder."""
     category_path = os.path.join(data_dir, category)
-    if os.path.isdir(category_path):
-        pred_category_path = os.path.join(prediction_dir, category)
-        if not os.path.exists(pred_category_path):
-            os.makedirs(pred_category_path)
+    images = sorted(f for f in os.listdir(category_path) if f.lower().endswith(IMAGE_EXTENSIONS))
+
+    # Hashes are reused for files whose size and mtime did not change
+    hashes = {}
+    for img in images:
+        relative_path = os.path.join(category, img)
+        stat = os.stat(os.path.join(category_path, img))
+        cached = previous_hashes.get(relative_path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            hashes[relative_path] = cached
+        else:
+            hashes[relative_path] = [stat.st_size, stat.st_mtime_ns, file_hash(os.path.join(category_path, img))]
+
+    # Rank distinct contents by a seeded hash: the pick is reproducible, ignores file names and
+    # stays stable as images are added, and duplicates of a held-out image are held out with it
+    contents = sorted({entry[2] for entry in hashes.values()},
+                      key=lambda digest: hashlib.sha1(f"{seed}:{digest}".encode()).hexdigest())
+    selected_hashes = set(contents[:max(1, int(len(contents) * holdout_fraction))]) if contents else set()
+    selected = sorted(path for path, entry in hashes.items() if entry[2] in selected_hashes)
+
+    pred_category_path = os.path.join(prediction_dir, category)
+    os.makedirs(pred_category_path, exist_ok=True)
+    methods = {}
+    for relative_path in selected:
+        source = os.path.join(data_dir, relative_path)
+        target = os.path.join(prediction_dir, relative_path)
+        if os.path.exists(target):
+            if os.path.samefile(source, target) or file_hash(target) == hashes[relative_path][2]:
+                continue
+            os.remove(target)
+        method = link_file(source, target)
+        methods[method] = methods.get(method, 0) + 1
+    return category, selected, sorted(selected_hashes), hashes, methods
+
+
+def main():
+    # Ensure data exists
+    if not os.path.exists(data_dir):
+        raise FileNotFoundError(f"Dataset folder '{data_dir}' not found!")
+    os.makedirs(prediction_dir, exist_ok=True)
+
+    previous = load_holdout()
+    if previous and (previous["seed"], previous["fraction"]) != (seed, holdout_fraction):
+        print("Seed or fraction changed; selecting a new hold-out.")
+    previous_hashes = previous["file_hashes"] if previous else {}
+
+    categories = sorted(c for c in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, c)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda category: prepare_category(category, previous_hashes), categories))
+
+    manifest = {
+        "source_dir": data_dir,
+        "seed": seed,
+        "fraction": holdout_fraction,
+        "categories": {},
+        "hashes": [],
+        "file_hashes": {},
+    }
+    for category, selected, selected_hashes, hashes, methods in results:
+        manifest["categories"][category] = selected
+        manifest["hashes"] += selected_hashes
+        manifest["file_hashes"].update(hashes)
+        linked = ", ".join(f"{count} by {method}" for method, count in methods.items()) or "nothing new to link"
+        print(f"Held out {len(selected)} images in '{category}' ({linked})")
+
+    # Files that are no longer held out leave the prediction folder
+    if previous:
+        kept = {path for files in manifest["categories"].values() for path in files}
+        for files in previous["categories"].values():
+            for path in files:
+                if path not in kept and os.path.exists(os.path.join(prediction_dir, path)):
+                    os.remove(os.path.join(prediction_dir, path))
+
+    temporary_path = HOLDOUT_MANIFEST + ".tmp"
+    with open(temporary_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(temporary_path, HOLDOUT_MANIFEST)
+    print(f"Hold-out manifest saved to {HOLDOUT_MANIFEST}; training excludes these images.")
 
-        images = [f for f in os.listdir(category_path) if f.endswith(('jpg', 'png', 'jpeg'))]
-        selected = random.sample(images, max(1, len(images) // 50))  # 2% of images
 
-        for img in selected:
-            shutil.copy(os.path.join(category_path, img), os.path.join(pred_category_path, img))
-        print(f"Prepared {len(selected)} images for prediction in '{category}'")
+if __name__ == "__main__":
+    main()
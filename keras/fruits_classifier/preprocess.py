@@ -0,0 +1,213 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# Paths
+source_dir = "fruits"
+output_dir = "fruits_preprocessed"
+MANIFEST_NAME = "manifest.json"
+
+# Preprocessing
+img_size = (128, 128)  # (height, width)
+validation_split = 0.2
+shard_size = 1024  # Images per .npy shard (~48 MB at 128x128x3 uint8)
+workers = os.cpu_count() or 4
+
+# Same extensions flow_from_directory accepts
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".ppm", ".tif", ".tiff")
+
+
+def list_source_images(data_dir):
+    """Sorted class folders and, per class, its sorted image paths relative to data_dir."""
+    class_names = sorted(d for d in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, d)))
+    files = {}
+    for name in class_names:
+        files[name] = []
+        for root, _, filenames in sorted(os.walk(os.path.join(data_dir, name)), key=lambda entry: entry[0]):
+            files[name] += [
+                os.path.relpath(os.path.join(root, f), data_dir)
+                for f in sorted(filenames) if f.lower().endswith(IMAGE_EXTENSIONS)
+            ]
+    return files
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def load_image(path, size):
+    """Decodes an image to RGB uint8 with load_img's default nearest-neighbour resize."""
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGB").resize((size[1], size[0]), Image.NEAREST), dtype=np.uint8)
+
+
+def write_shard(shard_path, paths, size):
+    """Decodes `paths` into one memory-mappable uint8 shard. Returns which images decoded."""
+    temporary_path = shard_path + ".tmp.npy"
+    images = np.lib.format.open_memmap(temporary_path, mode="w+", dtype=np.uint8, shape=(len(paths),) + tuple(size) + (3,))
+    decoded = []
+    for index, path in enumerate(paths):
+        try:
+            images[index] = load_image(path, size)
+            decoded.append(True)
+        except Exception as e:
+            print(f"Error processing image {path}: {e}")
+            decoded.append(False)
+    images.flush()
+    del images
+    os.replace(temporary_path, shard_path)
+    return decoded
+
+
+def load_manifest(data_dir):
+    """The manifest of a preprocessed directory, or None if it has not been built."""
+    path = os.path.join(data_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def open_shards(data_dir, manifest):
+    """Memory-maps every shard of a preprocessed directory (nothing is read until indexed)."""
+    return {name: np.load(os.path.join(data_dir, name), mmap_mode="r") for name in manifest["shards"]}
+
+
+def split_entries(manifest, subset):
+    return [entry for entry in manifest["images"] if entry["split"] == subset]
+
+
+def preprocess(source_dir, output_dir, size=img_size, split=validation_split, shard_size=shard_size, workers=workers):
+    """
+    Resizes every image of `source_dir` once into uint8 .npy shards under `output_dir`.
+    Files whose content hash is already in the manifest (at the same size) are not decoded again.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    previous = load_manifest(output_dir)
+    if previous and tuple(previous["img_size"]) != tuple(size):
+        print(f"Image size changed from {tuple(previous['img_size'])} to {tuple(size)}; rebuilding every shard.")
+        previous = None
+    known_files = {entry["path"]: entry for entry in previous["images"]} if previous else {}
+    known_hashes = {entry["sha1"]: entry for entry in previous["images"]} if previous else {}
+
+    files = list_source_images(source_dir)
+    class_indices = {name: index for index, name in enumerate(files)}
+    relative_paths = [path for paths in files.values() for path in paths]
+
+    # Content hashes; size and mtime let unchanged files skip re-reading
+    start = time.perf_counter()
+    stats = {path: os.stat(os.path.join(source_dir, path)) for path in relative_paths}
+    to_hash = [
+        path for path in relative_paths
+        if path not in known_files
+        or known_files[path]["bytes"] != stats[path].st_size
+        or known_files[path]["mtime_ns"] != stats[path].st_mtime_ns
+    ]
+    hashes = {path: known_files[path]["sha1"] for path in relative_paths if path not in to_hash}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        full_paths = [os.path.join(source_dir, path) for path in to_hash]
+        hashes.update(zip(to_hash, executor.map(file_hash, full_paths, chunksize=64)))
+    print(f"Hashed {len(to_hash)} new or modified files in {time.perf_counter() - start:.1f}s")
+
+    # Images held out by prepare_predictions.py, and any copy of their content, never reach the shards
+    # (imported here: prepare_predictions imports file_hash and IMAGE_EXTENSIONS from this module)
+    from prepare_predictions import holdout_exclusions
+    excluded_paths, excluded_hashes = holdout_exclusions(source_dir)
+    held_out = {path for path in relative_paths if path in excluded_paths or hashes[path] in excluded_hashes}
+    if held_out:
+        print(f"Excluding {len(held_out)} hold-out images.")
+        files = {name: [path for path in paths if path not in held_out] for name, paths in files.items()}
+        relative_paths = [path for path in relative_paths if path not in held_out]
+
+    # Only content not already in a shard is decoded
+    first_path = {}
+    for path in relative_paths:
+        if hashes[path] not in known_hashes:
+            first_path.setdefault(hashes[path], path)  # Duplicate files share one decoded copy
+    new_paths = list(first_path.values())
+
+    existing = [int(name[len("shard_"):-len(".npy")]) for name in (previous or {}).get("shards", {})]
+    next_shard = max(existing, default=-1) + 1
+    start = time.perf_counter()
+    decoded_at = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        jobs = []
+        for offset in range(0, len(new_paths), shard_size):
+            name = f"shard_{next_shard:05d}.npy"
+            next_shard += 1
+            chunk = new_paths[offset:offset + shard_size]
+            full_paths = [os.path.join(source_dir, path) for path in chunk]
+            jobs.append((name, chunk, executor.submit(write_shard, os.path.join(output_dir, name), full_paths, size)))
+        for name, chunk, job in jobs:
+            for index, (path, decoded) in enumerate(zip(chunk, job.result())):
+                if decoded:
+                    decoded_at[hashes[path]] = (name, index)
+    elapsed = time.perf_counter() - start
+    rate = f" ({len(new_paths) / elapsed:.0f} images/s)" if new_paths else ""
+    print(f"Decoded {len(new_paths)} new images into {len(jobs)} shards in {elapsed:.1f}s{rate}")
+
+    # The split follows flow_from_directory: the first `split` of every class's sorted files is validation
+    images = []
+    for name, paths in files.items():
+        split_at = int(split * len(paths))
+        for position, path in enumerate(paths):
+            digest = hashes[path]
+            if digest in known_hashes:
+                location = (known_hashes[digest]["shard"], known_hashes[digest]["index"])
+            elif digest in decoded_at:
+                location = decoded_at[digest]
+            else:
+                continue  # Could not be decoded
+            images.append({
+                "path": path,
+                "sha1": digest,
+                "bytes": stats[path].st_size,
+                "mtime_ns": stats[path].st_mtime_ns,
+                "label": class_indices[name],
+                "split": "validation" if position < split_at else "training",
+                "shard": location[0],
+                "index": location[1],
+            })
+
+    shards = {}
+    for entry in images:
+        shards[entry["shard"]] = shards.get(entry["shard"], 0) + 1
+
+    manifest = {
+        "img_size": list(size),
+        "validation_split": split,
+        "holdout_excluded": len(held_out),
+        "class_indices": class_indices,
+        "shards": dict(sorted(shards.items())),
+        "images": images,
+    }
+    temporary_path = os.path.join(output_dir, MANIFEST_NAME + ".tmp")
+    with open(temporary_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(temporary_path, os.path.join(output_dir, MANIFEST_NAME))
+
+    # Only once the new manifest is in place: shards it does not reference, including leftovers of interrupted runs
+    for name in os.listdir(output_dir):
+        if name.startswith("shard_") and name.endswith(".npy") and name not in shards:
+            os.remove(os.path.join(output_dir, name))
+
+    counts = {subset: len(split_entries(manifest, subset)) for subset in ("training", "validation")}
+    print(f"Manifest: {len(images)} images ({counts['training']} training, {counts['validation']} validation) "
+          f"in {len(shards)} shards, {len(class_indices)} classes.")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resize images once into memory-mappable uint8 .npy shards.")
+    parser.add_argument("source", nargs="?", default=source_dir)
+    parser.add_argument("output", nargs="?", default=output_dir)
+    parser.add_argument("--validation-split", type=float, default=validation_split)
+    args = parser.parse_args()
+    preprocess(args.source, args.output, split=args.validation_split)
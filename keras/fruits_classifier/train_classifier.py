@@ -1,57 +1,45 @@
 import tensorflow as tf
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
-from tensorflow.keras import layers, models
 from tensorflow.keras.callbacks import EarlyStopping
 import matplotlib.pyplot as plt
 import os
 import json
+from input_pipeline import ThroughputLogger, load_datasets, measure_throughput
+from training_setup import build_model, configure_precision, configure_threads, scaled_learning_rate
 
 # Paths
-data_dir = "fruits_preprocessed"
+data_dir = "fruits_preprocessed"  # Built by preprocess.py; a folder of class subfolders also works
 model_save_path = "apple_classifier.h5"
+cache_dir = "cache"  # Decoded images are cached here after the first epoch; "" caches them in memory
 
 # Hyperparameters
 img_size = (128, 128)
-batch_size = 32
+base_batch_size = 32
+base_learning_rate = 1e-3  # Adam's default at base_batch_size
+batch_size = 32  # Larger batches scale the learning rate linearly
 epochs = 10  # Set a high number to let early stopping decide when to stop
+validation_split = 0.2
+benchmark_input_pipeline = False  # Diagnostic: time the input pipeline alone (uncached, then cached) before training
 
-# Data preparation
-datagen = ImageDataGenerator(validation_split=0.2)
+# Performance (see benchmark_training.py to pick these)
+intra_op_threads = 0  # Threads inside one op, e.g. a convolution; 0 lets TensorFlow decide
+inter_op_threads = 0  # Independent ops run concurrently; 0 lets TensorFlow decide
+jit_compile = False  # XLA-compile the train step
+mixed_bfloat16 = False  # Only takes effect on CPUs with native bfloat16
 
-train_data = datagen.flow_from_directory(
-    data_dir,
-    target_size=img_size,
-    batch_size=batch_size,
-    class_mode='categorical',
-    subset='training'
-)
+configure_threads(intra_op_threads, inter_op_threads)
+configure_precision(mixed_bfloat16)
 
-val_data = datagen.flow_from_directory(
-    data_dir,
-    target_size=img_size,
-    batch_size=batch_size,
-    class_mode='categorical',
-    subset='validation'
-)
+# Data preparation: shards built by preprocess.py when available, otherwise the image folders
+class_indices, train_data, val_data, train_size = load_datasets(data_dir, img_size, batch_size, validation_split, cache_dir)
+
+if benchmark_input_pipeline:
+    # Without shards, the first pass decodes and fills the cache and the second one reads it back
+    measure_throughput(train_data, "Input pipeline, first pass")
+    measure_throughput(train_data, "Input pipeline, second pass")
 
 # Model definition
-model = models.Sequential([
-    layers.InputLayer(input_shape=(128, 128, 3)),
-    layers.Conv2D(32, (3, 3), activation='relu'),
-    layers.MaxPooling2D((2, 2)),
-    layers.Conv2D(64, (3, 3), activation='relu'),
-    layers.MaxPooling2D((2, 2)),
-    layers.Conv2D(128, (3, 3), activation='relu'),
-    layers.MaxPooling2D((2, 2)),
-    layers.Flatten(),
-    layers.Dense(128, activation='relu'),
-    layers.Dense(len(train_data.class_indices), activation='softmax')
-])
-
-# Compile the model
-model.compile(optimizer='adam',
-              loss='categorical_crossentropy',
-              metrics=['accuracy'])
+learning_rate = scaled_learning_rate(base_learning_rate, batch_size, base_batch_size)
+model = build_model(len(class_indices), img_size, learning_rate, jit_compile)
 
 # Early stopping callback
 early_stopping = EarlyStopping(monitor='val_loss', patience=2, min_delta=1e-6, restore_best_weights=True)
@@ -61,7 +49,7 @@ history = model.fit(
     train_data,
     validation_data=val_data,
     epochs=epochs,
-    callbacks=[early_stopping]
+    callbacks=[early_stopping, ThroughputLogger(train_size)]
 )
 
 # Save the model
@@ -69,7 +57,6 @@ model.save(model_save_path)
 print(f"Model saved to {model_save_path}")
 
 # Save class indices to a JSON file
-class_indices = train_data.class_indices
 with open("class_indices.json", "w") as f:
     json.dump(class_indices, f)
 
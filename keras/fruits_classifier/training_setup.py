@@ -0,0 +1,54 @@
+import tensorflow as tf
+from tensorflow.keras import layers, models
+
+
+def configure_threads(intra_op_threads=0, inter_op_threads=0):
+    """Sizes TensorFlow's thread pools (0 keeps the default). Must run before any op executes."""
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+
+def cpu_supports_bfloat16():
+    """True on CPUs with native bfloat16 instructions (AVX512-BF16 or AMX); elsewhere it is emulated and slower."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def configure_precision(mixed_bfloat16):
+    """Enables the mixed_bfloat16 policy when asked for and supported. Returns whether it is active."""
+    if mixed_bfloat16 and not cpu_supports_bfloat16():
+        print("This CPU has no native bfloat16 support; training in float32.")
+        mixed_bfloat16 = False
+    tf.keras.mixed_precision.set_global_policy("mixed_bfloat16" if mixed_bfloat16 else "float32")
+    return mixed_bfloat16
+
+
+def scaled_learning_rate(base_learning_rate, batch_size, base_batch_size):
+    """Linear scaling rule: the learning rate grows with the batch size."""
+    return base_learning_rate * batch_size / base_batch_size
+
+
+def build_model(num_classes, img_size, learning_rate, jit_compile=False):
+    """The fruits CNN, compiled with Adam; XLA compiles the train step when jit_compile is set."""
+    model = models.Sequential([
+        layers.InputLayer(input_shape=img_size + (3,)),
+        layers.Conv2D(32, (3, 3), activation='relu'),
+        layers.MaxPooling2D((2, 2)),
+        layers.Conv2D(64, (3, 3), activation='relu'),
+        layers.MaxPooling2D((2, 2)),
+        layers.Conv2D(128, (3, 3), activation='relu'),
+        layers.MaxPooling2D((2, 2)),
+        layers.Flatten(),
+        layers.Dense(128, activation='relu'),
+        # Probabilities stay float32 under mixed precision
+        layers.Dense(num_classes, activation='softmax', dtype='float32')
+    ])
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
+                  loss='categorical_crossentropy',
+                  metrics=['accuracy'],
+                  jit_compile=jit_compile)
+    return model
@@ -0,0 +1,83 @@
+import os
+import time
+
+import joblib
+import numpy as np
+
+from export_model import EXPORT_DIR, MODEL_PATH, TFLITE_QUANTIZATIONS, tflite_path
+from features import augment_features
+from lite_scorer import load_scorer
+from log_io import find_log_source, load_logs
+from windowing import sliding_windows
+
+# Paths
+LOG_FILE_PATH = "/app/logs/server_logs.txt"
+SCALER_PATH = "/app/models/scaler.pkl"
+
+# Benchmark settings
+BENCHMARK_WINDOWS = 5_000  # Windows scored per model
+BATCH_SIZES = [1, 64, 256]
+THRESHOLD_PERCENTILE = 99
+
+
+def load_windows(time_steps):
+    """Real scaled windows from the logs when available, random ones otherwise."""
+    if os.path.exists(SCALER_PATH) and os.path.exists(find_log_source(LOG_FILE_PATH)):
+        df = load_logs(find_log_source(LOG_FILE_PATH)).iloc[:BENCHMARK_WINDOWS + time_steps - 1]
+        scaled = joblib.load(SCALER_PATH).transform(augment_features(df)).astype(np.float32)
+        return np.ascontiguousarray(sliding_windows(scaled, time_steps))
+    print("No logs or scaler found; benchmarking on random windows.")
+    return np.random.default_rng(0).random((BENCHMARK_WINDOWS, time_steps, 9), dtype=np.float32)
+
+
+def score(scorer, windows, batch_size):
+    """Returns the per-window reconstruction errors and the latency of every batch call."""
+    errors = np.empty(len(windows), dtype=np.float32)
+    latencies = []
+    for start in range(0, len(windows), batch_size):
+        batch = windows[start:start + batch_size]
+        started = time.perf_counter()
+        reconstructed = np.asarray(scorer.predict_on_batch(batch))
+        latencies.append(time.perf_counter() - started)
+        errors[start:start + len(batch)] = np.mean(np.square(batch - reconstructed), axis=(1, 2))
+    return errors, np.array(latencies)
+
+
+def main():
+    candidates = [("keras", MODEL_PATH)]
+    candidates += [(f"tflite {q or 'float32'}", tflite_path(q)) for q in TFLITE_QUANTIZATIONS]
+    candidates.append(("onnx", os.path.join(EXPORT_DIR, "lstm_autoencoder_v2.onnx")))
+    candidates = [(name, path) for name, path in candidates if os.path.exists(path)]
+
+    reference_errors = None
+    windows = None
+    print(f"{'model':>20} | {'load (s)':>8} | {'batch':>5} | {'windows/s':>10} | {'p50 (ms)':>8} | "
+          f"{'p99 (ms)':>8} | {'max err drift':>13} | {'flips':>6}")
+    for name, path in candidates:
+        started = time.perf_counter()
+        scorer = load_scorer(path)
+        load_time = time.perf_counter() - started
+        if windows is None:
+            windows = load_windows(scorer.input_shape[1])
+
+        for batch_size in BATCH_SIZES:
+            started = time.perf_counter()
+            errors, latencies = score(scorer, windows, batch_size)
+            throughput = len(windows) / (time.perf_counter() - started)
+
+            if reference_errors is None:
+                reference_errors = errors
+                threshold = np.percentile(reference_errors, THRESHOLD_PERCENTILE)
+            drift = np.max(np.abs(errors - reference_errors) / np.maximum(reference_errors, 1e-12))
+            flips = int(np.sum((errors > threshold) != (reference_errors > threshold)))
+
+            print(f"{name:>20} | {load_time:>8.2f} | {batch_size:>5} | {throughput:>10.0f} | "
+                  f"{np.percentile(latencies, 50) * 1000:>8.2f} | {np.percentile(latencies, 99) * 1000:>8.2f} | "
+                  f"{drift:>12.2%} | {flips:>6}")
+
+    print(f"Drift is the largest relative change of a window's reconstruction error against Keras; "
+          f"flips counts windows that cross the {THRESHOLD_PERCENTILE}th-percentile threshold.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from log_io import load_text_logs
+
+# Benchmark settings
+BENCHMARK_LINES = 3_000_000  # Size of the synthetic server_logs.txt
+LEGACY_SAMPLE_LINES = 100_000  # The per-line loop is timed on a prefix and extrapolated
+LOG_INTERVAL = 30
+
+
+def load_text_logs_legacy(file_path, max_lines=None):
+    """The original per-line parser from train_model.py, kept as the benchmark baseline."""
+    logs = []
+    timestamps = []
+    with open(file_path, "r") as file:
+        for line_number, line in enumerate(file):
+            if max_lines is not None and line_number >= max_lines:
+                break
+            parts = line.strip().split(" | ")
+            timestamps.append(pd.to_datetime(parts[0]))
+            cpu = float(parts[1].split(": ")[1][:-1])
+            ram = float(parts[2].split(": ")[1][:-1])
+            disk = float(parts[3].split(": ")[1][:-1])
+            logs.append([cpu, ram, disk])
+    return pd.DataFrame(logs, columns=["cpu", "ram", "disk"]).assign(timestamp=timestamps)
+
+
+def write_synthetic_log(path, lines):
+    """Writes a server_logs.txt in the generator's format."""
+    rng = np.random.default_rng(0)
+    timestamps = pd.Series(pd.date_range("2024-01-01", periods=lines, freq=f"{LOG_INTERVAL}s"))
+    metrics = {name: pd.Series(np.round(rng.uniform(0, 100, lines), 1)).astype(str) for name in ["cpu", "ram", "disk"]}
+    text = (
+        timestamps.dt.strftime("%Y-%m-%d %H:%M:%S")
+        + " | CPU: " + metrics["cpu"]
+        + "% | RAM: " + metrics["ram"]
+        + "% | Disk: " + metrics["disk"]
+        + "%\n"
+    )
+    with open(path, "w") as file:
+        file.write("".join(text))
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "server_logs.txt")
+    print(f"Writing {BENCHMARK_LINES} synthetic log lines to {path}...")
+    write_synthetic_log(path, BENCHMARK_LINES)
+    print(f"File size: {os.path.getsize(path) / 1e6:.1f} MB")
+
+    started = time.perf_counter()
+    legacy = load_text_logs_legacy(path, max_lines=LEGACY_SAMPLE_LINES)
+    legacy_rate = len(legacy) / (time.perf_counter() - started)
+    legacy_estimate = BENCHMARK_LINES / legacy_rate
+
+    started = time.perf_counter()
+    df = load_text_logs(path)
+    vectorized_time = time.perf_counter() - started
+
+    # Both parsers must agree on the sampled prefix
+    sample = df.iloc[:len(legacy)].reset_index(drop=True)
+    assert np.allclose(sample[["cpu", "ram", "disk"]].to_numpy(), legacy[["cpu", "ram", "disk"]].to_numpy(), atol=1e-4)
+    assert (sample["timestamp"].to_numpy() == legacy["timestamp"].to_numpy()).all()
+
+    print(f"Per-line loop: {legacy_rate:,.0f} lines/s (~{legacy_estimate:.1f}s for {BENCHMARK_LINES} lines, "
+          f"extrapolated from {LEGACY_SAMPLE_LINES})")
+    print(f"Vectorized:    {len(df) / vectorized_time:,.0f} lines/s ({vectorized_time:.1f}s)")
+    print(f"Speedup:       {legacy_estimate / vectorized_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import json
+import os
+
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+
+from lite_scorer import metadata_path
+
+# Paths
+MODEL_PATH = "/app/models/lstm_autoencoder_v2.keras"
+EXPORT_DIR = "/app/models/"
+
+# TFLite variants to export: None keeps float32 weights
+TFLITE_QUANTIZATIONS = [None, "float16", "dynamic_int8"]
+ONNX_OPSET = 13
+
+
+def tflite_path(quantization):
+    suffix = f"_{quantization}" if quantization else ""
+    return os.path.join(EXPORT_DIR, f"lstm_autoencoder_v2{suffix}.tflite")
+
+
+def export_tflite(model, output_path, quantization=None):
+    """
+    Converts the autoencoder to TFLite, optionally with float16 or dynamic-range int8
+    weights. Whether the model needs TensorFlow (Flex) ops is saved in its metadata file,
+    so lite_scorer loads it on an interpreter that can run them.
+    """
+    def build_converter(select_tf_ops):
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        if quantization == "float16":
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            converter.target_spec.supported_types = [tf.float16]
+        elif quantization == "dynamic_int8":
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        elif quantization is not None:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        if select_tf_ops:
+            # Fallback for LSTM variants the builtin fused kernels cannot express
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+            converter._experimental_lower_tensor_list_ops = False
+        return converter
+
+    flex_ops = False
+    try:
+        tflite_model = build_converter(select_tf_ops=False).convert()
+    except Exception as e:
+        print(f"Builtin-only conversion failed ({e}); retrying with SELECT_TF_OPS.")
+        tflite_model = build_converter(select_tf_ops=True).convert()
+        flex_ops = True
+
+    with open(output_path, "wb") as f:
+        f.write(tflite_model)
+    with open(metadata_path(output_path), "w") as f:
+        json.dump({"quantization": quantization, "flex_ops": flex_ops}, f)
+    print(f"Saved TFLite model ({quantization or 'float32'}, {len(tflite_model) / 1e6:.1f} MB) to {output_path}")
+    if flex_ops:
+        print("  It uses TensorFlow (Flex) ops: it runs on tf.lite.Interpreter only, not on tflite_runtime.")
+
+
+def export_onnx(model, output_path):
+    """Converts the autoencoder to ONNX (requires tf2onnx)."""
+    try:
+        import tf2onnx
+    except ImportError:
+        print("tf2onnx is not installed; skipping the ONNX export.")
+        return
+
+    input_signature = [tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32, name="windows")]
+    tf2onnx.convert.from_keras(model, input_signature=input_signature, opset=ONNX_OPSET, output_path=output_path)
+    print(f"Saved ONNX model to {output_path}")
+
+
+def main():
+    print("Loading trained model...")
+    model = load_model(MODEL_PATH)
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    for quantization in TFLITE_QUANTIZATIONS:
+        export_tflite(model, tflite_path(quantization), quantization)
+    export_onnx(model, os.path.join(EXPORT_DIR, "lstm_autoencoder_v2.onnx"))
+
+    print("Export complete.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+# Rolling statistics shared by training, batch evaluation and the stream detector
+ROLLING_WINDOW = 10
+BASE_COLUMNS = ["cpu", "ram", "disk"]
+FEATURE_COLUMNS = BASE_COLUMNS + [f"{column}_{stat}" for column in BASE_COLUMNS for stat in ("mean", "std")]
+
+
+def rolling_features(values, history=None, window=ROLLING_WINDOW):
+    """
+    Rolling mean and sample std (min_periods=1, std of a single value is 0) of every
+    column of `values` in one fused pass. `history` holds up to window - 1 rows that
+    precede `values`, so chunks can be processed one after another.
+    Returns an array with the base columns followed by mean/std pairs per column.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rows, columns = values.shape
+    history = np.empty((0, columns)) if history is None else np.asarray(history, dtype=np.float64)
+    center = values.mean(axis=0) if rows else np.zeros(columns)  # Centering keeps the cumulative sums precise
+
+    # Column-major buffer: zero padding up to `window` slots, then the history, then the new rows
+    lead = window - len(history)
+    extended = np.zeros((columns, window + rows))
+    extended[:, lead:window] = (history - center).T
+    extended[:, window:] = (values - center).T
+
+    # Window sums as differences of cumulative sums
+    cumulative = np.cumsum(extended, axis=1)
+    cumulative_squares = np.cumsum(np.square(extended), axis=1)
+    sums = cumulative[:, window:] - cumulative[:, :-window]
+    squares = cumulative_squares[:, window:] - cumulative_squares[:, :-window]
+    counts = np.minimum(np.arange(len(history) + 1, len(history) + rows + 1), window)
+
+    centered_means = sums / counts
+    variances = (squares - sums * centered_means) / np.maximum(counts - 1, 1)
+    stds = np.where(counts > 1, np.sqrt(np.maximum(variances, 0)), 0.0)
+
+    # Output columns: the base columns, then a mean/std pair per column
+    features = np.empty((3 * columns, rows))
+    features[:columns] = values.T
+    features[columns::2] = centered_means + center[:, None]
+    features[columns + 1::2] = stds
+    return features.T
+
+
+def augment_features(df):
+    """Adds the rolling mean and std of cpu, ram and disk, returning FEATURE_COLUMNS."""
+    return pd.DataFrame(rolling_features(df[BASE_COLUMNS]), columns=FEATURE_COLUMNS, index=df.index)
+
+
+class RollingFeatures:
+    """Incremental augment_features: feed rows one at a time or in chunks, never recomputing from scratch."""
+
+    def __init__(self, window=ROLLING_WINDOW):
+        self.window = window
+        self.ring = np.zeros((window, len(BASE_COLUMNS)))
+        self.position = 0
+        self.count = 0
+        self.sums = np.zeros(len(BASE_COLUMNS))
+        self.squares = np.zeros(len(BASE_COLUMNS))
+
+    def history(self):
+        """The last window - 1 rows, oldest first."""
+        size = min(self.count, self.window - 1)
+        order = (self.position - size + np.arange(size)) % self.window
+        return self.ring[order]
+
+    def update_row(self, row):
+        """Adds one row using O(1) running sums and returns its feature vector."""
+        row = np.asarray(row, dtype=np.float64)
+        leaving = self.ring[self.position] if self.count >= self.window else 0.0
+        self.sums += row - leaving
+        self.squares += np.square(row) - np.square(leaving)
+        self.ring[self.position] = row
+        self.position = (self.position + 1) % self.window
+        self.count += 1
+
+        n = min(self.count, self.window)
+        means = self.sums / n
+        stds = np.sqrt(np.maximum((self.squares - self.sums * means) / (n - 1), 0)) if n > 1 else np.zeros_like(means)
+        return np.concatenate([row, np.stack([means, stds], axis=-1).ravel()])
+
+    def update(self, rows):
+        """Adds a chunk of rows in one vectorized pass and returns their feature matrix."""
+        rows = np.asarray(rows, dtype=np.float64)
+        if len(rows) == 0:
+            return np.empty((0, len(FEATURE_COLUMNS)))
+        features = rolling_features(rows, self.history(), self.window)
+
+        # Carry the last rows over, and rebuild the running sums from them
+        for row in rows[-self.window:]:
+            self.ring[self.position] = row
+            self.position = (self.position + 1) % self.window
+        self.count += len(rows)
+        current = self.ring[:min(self.count, self.window)]
+        self.sums = current.sum(axis=0)
+        self.squares = np.square(current).sum(axis=0)
+        return features
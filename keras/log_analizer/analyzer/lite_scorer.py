@@ -0,0 +1,90 @@
+import json
+import os
+
+import numpy as np
+
+
+def load_scorer(path):
+    """
+    Loads a scoring model by extension: .tflite and .onnx run on their light runtimes,
+    anything else is loaded with Keras. All of them expose input_shape and predict_on_batch.
+    """
+    if path.endswith(".tflite"):
+        return TFLiteScorer(path)
+    if path.endswith(".onnx"):
+        return ONNXScorer(path)
+    from tensorflow.keras.models import load_model
+    return load_model(path)
+
+
+def metadata_path(path):
+    """Sidecar file export_model.py writes next to each exported model."""
+    return path + ".json"
+
+
+def read_metadata(path):
+    """Export metadata of a model, or {} for models exported without it."""
+    if not os.path.exists(metadata_path(path)):
+        return {}
+    with open(metadata_path(path)) as f:
+        return json.load(f)
+
+
+def _tflite_interpreter(path):
+    """
+    Prefers the standalone tflite_runtime package, which does not import TensorFlow.
+    Models exported with SELECT_TF_OPS need the Flex delegate, which only the full
+    TensorFlow interpreter links in.
+    """
+    if read_metadata(path).get("flex_ops"):
+        try:
+            from tensorflow.lite import Interpreter
+        except ImportError:
+            raise ImportError(f"{path} uses TensorFlow (Flex) ops, which tflite_runtime cannot run; "
+                              "install tensorflow or export a builtin-only model.") from None
+        return Interpreter(model_path=path)
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        from tensorflow.lite import Interpreter
+    return Interpreter(model_path=path)
+
+
+class TFLiteScorer:
+    """Runs an exported autoencoder on the TFLite interpreter."""
+
+    def __init__(self, path):
+        self.interpreter = _tflite_interpreter(path)
+        self.interpreter.allocate_tensors()
+        self.input_index = self.interpreter.get_input_details()[0]["index"]
+        self.output_index = self.interpreter.get_output_details()[0]["index"]
+        shape = self.interpreter.get_input_details()[0]["shape"]
+        self.input_shape = (None,) + tuple(int(dim) for dim in shape[1:])
+        self.batch_size = int(shape[0])
+
+    def predict_on_batch(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        if len(batch) != self.batch_size:
+            # Tensors are only reallocated when the batch size changes
+            self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+            self.interpreter.allocate_tensors()
+            self.batch_size = len(batch)
+        self.interpreter.set_tensor(self.input_index, batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index)
+
+
+class ONNXScorer:
+    """Runs an exported autoencoder on ONNX Runtime's CPU provider."""
+
+    def __init__(self, path):
+        import onnxruntime as ort
+
+        self.session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_shape = (None,) + tuple(model_input.shape[1:])
+
+    def predict_on_batch(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return self.session.run(None, {self.input_name: batch})[0]
@@ -0,0 +1,119 @@
+import io
+import os
+import numpy as np
+import pandas as pd
+
+# Binary column layout written by generator/columnar_writer.py
+NPY_COLUMNS = ["timestamp", "cpu", "ram", "disk"]
+
+# Text log parsing
+TEXT_BLOCK_SIZE = 64 * 1024 * 1024  # Bytes parsed per block, so files larger than RAM can be streamed
+PARQUET_MAGIC = b"PAR1"
+# "2024-01-01 00:00:00 | CPU: 12.3% | RAM: 45.6% | Disk: 7.8%" -> "2024-01-01 00:00:00,12.3,45.6,7.8"
+TEXT_REPLACEMENTS = [
+    (b" | CPU: ", b","),
+    (b"% | RAM: ", b","),
+    (b"% | Disk: ", b","),
+    (b"%\n", b"\n"),
+]
+
+
+def find_log_source(text_path):
+    """
+    Returns the fastest available copy of a log: the .npy column directory,
+    then the .parquet file, falling back to the text log itself. Every copy present
+    comes from the same generator run, which deletes formats it does not write.
+    """
+    stem = os.path.splitext(text_path)[0]
+    if os.path.exists(os.path.join(stem, "timestamp.npy")):
+        return stem
+    if os.path.exists(f"{stem}.parquet"):
+        return f"{stem}.parquet"
+    return text_path
+
+
+def detect_log_format(path):
+    """Sniffs the log format from the path itself rather than trusting its extension."""
+    if os.path.isdir(path):
+        return "npy"
+    with open(path, "rb") as file:
+        if file.read(len(PARQUET_MAGIC)) == PARQUET_MAGIC:
+            return "parquet"
+    return "text"
+
+
+def load_logs(path):
+    """Loads logs as a DataFrame with cpu, ram, disk and timestamp columns, whatever the format."""
+    log_format = detect_log_format(path)
+    if log_format == "npy":
+        return load_npy_logs(path)
+    if log_format == "parquet":
+        return load_parquet_logs(path)
+    return load_text_logs(path)
+
+
+def load_log_arrays(directory):
+    """Memory-maps every column of a .npy log directory without reading it into RAM."""
+    return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in NPY_COLUMNS}
+
+
+def load_npy_logs(directory):
+    """Wraps the memory-mapped columns in a DataFrame without copying them."""
+    columns = load_log_arrays(directory)
+    return pd.DataFrame({
+        "cpu": columns["cpu"],
+        "ram": columns["ram"],
+        "disk": columns["disk"],
+        "timestamp": columns["timestamp"].view("datetime64[s]"),
+    }, copy=False)
+
+
+def load_parquet_logs(path):
+    """Reads a Parquet log (requires pyarrow) and converts its epoch timestamps."""
+    df = pd.read_parquet(path, memory_map=True)
+    df["timestamp"] = df["timestamp"].to_numpy().view("datetime64[s]")
+    return df[["cpu", "ram", "disk", "timestamp"]]
+
+
+def load_text_logs(file_path, block_size=TEXT_BLOCK_SIZE):
+    """Parses the human-readable server_logs.txt in large vectorized blocks."""
+    blocks = list(iter_text_logs(file_path, block_size))
+    if not blocks:
+        return parse_text_block(b"")
+    return pd.concat(blocks, ignore_index=True)
+
+
+def iter_text_logs(file_path, block_size=TEXT_BLOCK_SIZE):
+    """Yields one DataFrame per block of whole lines, for files larger than RAM."""
+    with open(file_path, "rb") as file:
+        remainder = b""
+        while True:
+            data = file.read(block_size)
+            if not data:
+                break
+            data = remainder + data
+            cut = data.rfind(b"\n") + 1  # Keep any partial last line for the next block
+            remainder = data[cut:]
+            if cut:
+                yield parse_text_block(data[:cut])
+        if remainder.strip():
+            yield parse_text_block(remainder + b"\n")
+
+
+def parse_text_block(data):
+    """
+    Turns a block of log lines into a DataFrame in one pass: the fixed labels are
+    rewritten into plain CSV with bytes.replace, then read by the C CSV parser, and
+    the timestamps are converted with a single pd.to_datetime call.
+    """
+    for old, new in TEXT_REPLACEMENTS:
+        data = data.replace(old, new)
+    df = pd.read_csv(
+        io.BytesIO(data),
+        header=None,
+        names=["timestamp", "cpu", "ram", "disk"],
+        dtype={"timestamp": str, "cpu": np.float32, "ram": np.float32, "disk": np.float32},
+        engine="c",
+    )
+    df["timestamp"] = pd.to_datetime(df["timestamp"], format="%Y-%m-%d %H:%M:%S")
+    return df[["cpu", "ram", "disk", "timestamp"]]
@@ -0,0 +1,352 @@
+import argparse
+import json
+import os
+import selectors
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from features import BASE_COLUMNS, FEATURE_COLUMNS, RollingFeatures
+from lite_scorer import load_scorer
+from log_io import parse_text_block
+
+# Paths
+LOG_FILE_PATH = "/app/logs/server_logs.txt"
+SCALER_PATH = "/app/models/scaler.pkl"
+MODEL_PATH = "/app/models/lstm_autoencoder_v2.keras"  # Or an exported .tflite/.onnx model (see export_model.py)
+ANOMALIES_OUTPUT_PATH = "/app/logs/stream_anomalies.csv"
+SOCKET_PATH = "/app/logs/detector.sock"
+
+# Parameters
+THRESHOLD_QUANTILE = 0.99  # Same percentile as the offline evaluation
+WARMUP_WINDOWS = 1000  # Windows scored before the streaming threshold is trusted
+MAX_BATCH_SIZE = 256  # Windows per predict_on_batch call
+POLL_INTERVAL = 0.05  # Seconds between reads of a tailed file
+READ_SIZE = 1 << 20  # Max bytes read from the source per block
+METRICS_PORT = 8001  # HTTP port serving the counters as JSON (0 disables it)
+LATENCY_SAMPLES = 10_000  # Recent latencies kept for the p50/p99 counters
+
+
+class P2Quantile:
+    """Streaming quantile estimate in O(1) memory (Jain & Chlamtac's P-square algorithm)."""
+
+    def __init__(self, quantile):
+        self.quantile = quantile
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * quantile, 1 + 4 * quantile, 3 + 2 * quantile, 5]
+        self.increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+        self.count = 0
+
+    def update(self, value):
+        self.count += 1
+        if len(self.heights) < 5:
+            self.heights.append(value)
+            self.heights.sort()
+            return
+
+        heights = self.heights
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if heights[i] <= value < heights[i + 1])
+
+        for i in range(cell + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the three middle markers towards their desired positions
+        for i in range(1, 4):
+            offset = self.desired[i] - self.positions[i]
+            if (offset >= 1 and self.positions[i + 1] - self.positions[i] > 1) or \
+                    (offset <= -1 and self.positions[i - 1] - self.positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, step)
+                heights[i] = height
+                self.positions[i] += step
+
+    def _parabolic(self, i, step):
+        n, q = self.positions, self.heights
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i, step):
+        n, q = self.positions, self.heights
+        return q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+
+    def value(self):
+        if not self.heights:
+            return float("nan")
+        if len(self.heights) < 5:
+            return float(np.quantile(self.heights, self.quantile))
+        return self.heights[2]
+
+
+class DetectorStats:
+    """Throughput and latency counters, readable from the metrics thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.rows = 0
+        self.windows = 0
+        self.batches = 0
+        self.anomalies = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def record_batch(self, windows, latencies):
+        with self.lock:
+            self.windows += windows
+            self.batches += 1
+            self.latencies.extend(latencies)
+
+    def snapshot(self, threshold):
+        with self.lock:
+            elapsed = time.monotonic() - self.started
+            latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+            return {
+                "uptime_seconds": round(elapsed, 1),
+                "rows": self.rows,
+                "windows_scored": self.windows,
+                "batches": self.batches,
+                "anomalies": self.anomalies,
+                "rows_per_second": round(self.rows / elapsed, 1) if elapsed else 0.0,
+                "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+                "latency_p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 2),
+                "threshold": threshold,
+            }
+
+
+class StreamingDetector:
+    """Scores log rows as they arrive against the trained LSTM autoencoder."""
+
+    def __init__(self, model, scaler, output_path=ANOMALIES_OUTPUT_PATH):
+        self.model = model
+        self.scaler = scaler
+        self.features = RollingFeatures()
+        self.time_steps = model.input_shape[1]
+        n_features = model.input_shape[2]
+        # Every row is written twice, so the last TIME_STEPS rows are always one contiguous slice
+        self.ring = np.zeros((2 * self.time_steps, n_features), dtype=np.float32)
+        self.position = 0
+        self.rows_seen = 0
+        self.threshold = P2Quantile(THRESHOLD_QUANTILE)
+        self.stats = DetectorStats()
+        self.output_path = output_path
+
+    def reset(self):
+        """Forgets the rows seen so far, e.g. when the tailed file was truncated or replaced; the threshold is kept."""
+        self.features = RollingFeatures()
+        self.ring[:] = 0
+        self.position = 0
+        self.rows_seen = 0
+
+    def push(self, row):
+        self.ring[self.position] = row
+        self.ring[self.position + self.time_steps] = row
+        self.position = (self.position + 1) % self.time_steps
+        self.rows_seen += 1
+
+    def window(self):
+        return self.ring[self.position:self.position + self.time_steps]
+
+    def process(self, data, received_at):
+        """Parses a block of complete log lines, scores every new window and returns the anomalies."""
+        df = parse_text_block(data)
+        if df.empty:
+            return []
+        features = self.features.update(df[BASE_COLUMNS].to_numpy())
+        rows = self.scaler.transform(pd.DataFrame(features, columns=FEATURE_COLUMNS)).astype(np.float32)
+
+        windows = []
+        timestamps = []
+        for row, timestamp in zip(rows, df["timestamp"]):
+            self.push(row)
+            if self.rows_seen >= self.time_steps:
+                windows.append(self.window().copy())
+                timestamps.append(timestamp)
+        with self.stats.lock:
+            self.stats.rows += len(rows)
+
+        anomalies = []
+        for start in range(0, len(windows), MAX_BATCH_SIZE):
+            batch = np.stack(windows[start:start + MAX_BATCH_SIZE])
+            reconstructed = np.asarray(self.model.predict_on_batch(batch))
+            errors = np.mean(np.square(batch - reconstructed), axis=(1, 2))
+            scored_at = time.monotonic()
+            self.stats.record_batch(len(batch), [scored_at - received_at] * len(batch))
+
+            for timestamp, error in zip(timestamps[start:start + MAX_BATCH_SIZE], errors):
+                threshold = self.threshold.value()
+                if self.threshold.count >= WARMUP_WINDOWS and error > threshold:
+                    anomalies.append((timestamp, float(error), threshold))
+                self.threshold.update(float(error))
+
+        if anomalies:
+            self.emit(anomalies)
+        return anomalies
+
+    def emit(self, anomalies):
+        with self.stats.lock:
+            self.stats.anomalies += len(anomalies)
+        with open(self.output_path, "a") as output:
+            for timestamp, error, threshold in anomalies:
+                output.write(f"{timestamp},{error:.6f},{threshold:.6f}\n")
+                print(f"Anomaly at {timestamp} | error={error:.6f} > threshold={threshold:.6f}", flush=True)
+
+
+def follow_file(path, from_start=False, on_restart=None):
+    """
+    Yields blocks of complete lines appended to a file, like `tail -F`. When the file is
+    truncated or replaced (another inode at `path`), it is read again from its start,
+    after calling `on_restart` so no window mixes rows of the old and the new file.
+    """
+    while True:
+        while not os.path.exists(path):
+            time.sleep(POLL_INTERVAL)
+        with open(path, "rb") as file:
+            if not from_start:
+                file.seek(0, os.SEEK_END)
+            remainder = b""
+            while True:
+                data = file.read(READ_SIZE)
+                if not data:
+                    try:
+                        current = os.stat(path)
+                    except FileNotFoundError:
+                        current = None
+                    # Replaced or removed: the old file is read to its end, then the new one is opened
+                    if current is None or current.st_ino != os.fstat(file.fileno()).st_ino:
+                        break
+                    if current.st_size < file.tell():
+                        file.seek(0)
+                        remainder = b""
+                        if on_restart:
+                            on_restart()
+                    time.sleep(POLL_INTERVAL)
+                    continue
+                data = remainder + data
+                cut = data.rfind(b"\n") + 1
+                remainder = data[cut:]
+                if cut:
+                    yield data[:cut]
+        from_start = True
+        if on_restart:
+            on_restart()
+
+
+def read_pipe(stream):
+    """Yields blocks of complete lines from a pipe such as stdin."""
+    remainder = b""
+    while True:
+        data = stream.read1(READ_SIZE)
+        if not data:
+            return
+        data = remainder + data
+        cut = data.rfind(b"\n") + 1
+        remainder = data[cut:]
+        if cut:
+            yield data[:cut]
+
+
+def read_socket(path):
+    """Listens on a local UNIX socket and yields blocks of complete lines from any connected client."""
+    if os.path.exists(path):
+        os.remove(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+    server.setblocking(False)
+
+    selector = selectors.DefaultSelector()
+    selector.register(server, selectors.EVENT_READ)
+    remainders = {}
+    while True:
+        for key, _ in selector.select():
+            if key.fileobj is server:
+                connection, _ = server.accept()
+                connection.setblocking(False)
+                selector.register(connection, selectors.EVENT_READ)
+                remainders[connection] = b""
+                continue
+
+            connection = key.fileobj
+            data = connection.recv(READ_SIZE)
+            if not data:
+                selector.unregister(connection)
+                connection.close()
+                remainders.pop(connection, None)
+                continue
+            data = remainders[connection] + data
+            cut = data.rfind(b"\n") + 1
+            remainders[connection] = data[cut:]
+            if cut:
+                yield data[:cut]
+
+
+def serve_metrics(detector, port):
+    """Serves the detector counters as JSON on http://0.0.0.0:<port>/metrics in a background thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = json.dumps(detector.stats.snapshot(detector.threshold.value())).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving detector metrics on port {port}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Online anomaly detection over a stream of server logs.")
+    parser.add_argument("--source", choices=["file", "socket", "pipe"], default="file")
+    parser.add_argument("--path", default=None, help="Log file to tail or socket to listen on")
+    parser.add_argument("--from-start", action="store_true", help="Score the existing file before tailing it")
+    parser.add_argument("--model", default=MODEL_PATH, help="Keras, .tflite or .onnx model to score with")
+    args = parser.parse_args()
+
+    print("Loading scaler and model...")
+    scaler = joblib.load(SCALER_PATH)
+    model = load_scorer(args.model)
+    detector = StreamingDetector(model, scaler)
+    print(f"Scoring windows of {detector.time_steps} rows (threshold quantile {THRESHOLD_QUANTILE}).")
+
+    if METRICS_PORT:
+        serve_metrics(detector, METRICS_PORT)
+
+    if args.source == "file":
+        blocks = follow_file(args.path or LOG_FILE_PATH, from_start=args.from_start, on_restart=detector.reset)
+    elif args.source == "socket":
+        blocks = read_socket(args.path or SOCKET_PATH)
+    else:
+        blocks = read_pipe(sys.stdin.buffer)
+
+    for block in blocks:
+        detector.process(block, time.monotonic())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 import numpy as np
-import pandas as pd
 from tensorflow.keras.models import Model
 from tensorflow.keras.layers import Input, LSTM, RepeatVector, TimeDistributed, Dense, Bidirectional
 from tensorflow.keras.callbacks import EarlyStopping
@@ -8,6 +7,10 @@ import matplotlib.pyplot as plt
 import joblib
 import os
 
+from features import augment_features
+from log_io import find_log_source, load_logs
+from windowing import sliding_windows, split_window_indices, WindowSequence
+
 # Paths
 LOG_FILE_PATH = "/app/logs/server_logs.txt"
 SCALER_PATH = "/app/models/scaler.pkl"
@@ -17,44 +20,16 @@ CHART_PATH = "/app/charts/loss_curves_lstm_v2.png"
 
 # Parameters
 TIME_STEPS = 50  # Increased number of timesteps in each sequence
+WINDOW_STRIDE = 1  # Hop between consecutive windows
 BATCH_SIZE = 64
 EPOCHS = 100
 VALIDATION_SPLIT = 0.2
 
-# Function to load logs
-def load_logs(file_path):
-    logs = []
-    with open(file_path, "r") as file:
-        for line in file:
-            parts = line.strip().split(" | ")
-            cpu = float(parts[1].split(": ")[1][:-1])
-            ram = float(parts[2].split(": ")[1][:-1])
-            disk = float(parts[3].split(": ")[1][:-1])
-            logs.append([cpu, ram, disk])
-    return pd.DataFrame(logs, columns=["cpu", "ram", "disk"])
-
-# Function to create statistical features
-def augment_features(df):
-    df['cpu_mean'] = df['cpu'].rolling(window=10, min_periods=1).mean()
-    df['cpu_std'] = df['cpu'].rolling(window=10, min_periods=1).std()
-    df['ram_mean'] = df['ram'].rolling(window=10, min_periods=1).mean()
-    df['ram_std'] = df['ram'].rolling(window=10, min_periods=1).std()
-    df['disk_mean'] = df['disk'].rolling(window=10, min_periods=1).mean()
-    df['disk_std'] = df['disk'].rolling(window=10, min_periods=1).std()
-    return df.fillna(0)  # Fill NaN values with 0
-
-# Function to prepare sequences for LSTM
-def create_sequences(data, time_steps):
-    sequences = []
-    for i in range(len(data) - time_steps + 1):
-        sequences.append(data[i : i + time_steps])
-    return np.array(sequences)
-
 # Function to preprocess data
 def preprocess_data(df):
     scaler = MinMaxScaler()
-    scaled_data = scaler.fit_transform(df)
-    sequences = create_sequences(scaled_data, TIME_STEPS)
+    scaled_data = scaler.fit_transform(df).astype(np.float32)
+    sequences = sliding_windows(scaled_data, TIME_STEPS, WINDOW_STRIDE)
     return sequences, scaler
 
 # Build Bidirectional LSTM Autoencoder
@@ -86,7 +61,7 @@ def plot_loss(history, output_path):
 # Main training function
 def main():
     print("Loading logs...")
-    df = load_logs(LOG_FILE_PATH)
+    df = load_logs(find_log_source(LOG_FILE_PATH))
     print(f"Loaded {len(df)} logs.")
 
     print("Augmenting features...")
@@ -111,13 +86,11 @@ def main():
         restore_best_weights=True
     )
 
+    train_indices, val_indices = split_window_indices(len(sequences), VALIDATION_SPLIT)
     history = model.fit(
-        sequences,
-        sequences,
+        WindowSequence(sequences, BATCH_SIZE, train_indices, shuffle=True),
+        validation_data=WindowSequence(sequences, BATCH_SIZE, val_indices),
         epochs=EPOCHS,
-        batch_size=BATCH_SIZE,
-        validation_split=VALIDATION_SPLIT,
-        shuffle=True,
         callbacks=[early_stopping]
     )
 
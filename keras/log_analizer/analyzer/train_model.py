@@ -6,38 +6,22 @@ import joblib
 import os
 import matplotlib.pyplot as plt
 
+from features import augment_features
+from log_io import find_log_source, load_logs
+from windowing import sliding_windows, window_end_indices, batch_reconstruction_errors
+
 # Paths
 LOG_FILE_PATH = "/app/logs/server_logs.txt"
 DEBUG_LOG_FILE_PATH = "/app/logs/debug_logs.txt"
 SCALER_PATH = "/app/models/scaler.pkl"
-MODEL_PATH = "/app/models/lstm_autoencoder.keras"
+MODEL_PATH = "/app/models/lstm_autoencoder_v2.keras"
 CHARTS_OUTPUT_DIR = "/app/charts/"
 ANOMALIES_OUTPUT_PATH = "/app/logs/anomalies.csv"
 ERROR_HISTOGRAM_PATH = "/app/charts/unseen_data_errors.png"
 
 # Parameters
-TIME_STEPS = 30
-
-# Function to load logs
-def load_logs(file_path):
-    logs = []
-    timestamps = []
-    with open(file_path, "r") as file:
-        for line in file:
-            parts = line.strip().split(" | ")
-            timestamps.append(pd.to_datetime(parts[0]))
-            cpu = float(parts[1].split(": ")[1][:-1])
-            ram = float(parts[2].split(": ")[1][:-1])
-            disk = float(parts[3].split(": ")[1][:-1])
-            logs.append([cpu, ram, disk])
-    return pd.DataFrame(logs, columns=["cpu", "ram", "disk"]).assign(timestamp=timestamps)
-
-# Function to create sequences
-def create_sequences(data, time_steps):
-    sequences = []
-    for i in range(len(data) - time_steps + 1):
-        sequences.append(data[i : i + time_steps])
-    return np.array(sequences)
+WINDOW_STRIDE = 1  # Hop between consecutive windows
+BATCH_SIZE = 1024  # Windows scored per predict_on_batch call
 
 # Function to evaluate the model
 def evaluate_model(ground_truth_anomalies, detected_anomalies, total_samples, timestamps):
@@ -74,23 +58,23 @@ def plot_error_histogram(errors, threshold, output_path):
 # Main testing function
 def main():
     print("Loading logs...")
-    df = load_logs(LOG_FILE_PATH)
+    df = load_logs(find_log_source(LOG_FILE_PATH))
     print(f"Loaded {len(df)} logs.")
 
     print("Loading scaler...")
     scaler = joblib.load(SCALER_PATH)
 
-    print("Creating sequences...")
-    scaled_data = scaler.transform(df[["cpu", "ram", "disk"]])
-    sequences = create_sequences(scaled_data, TIME_STEPS)
-    print(f"Prepared {len(sequences)} sequences for testing.")
-
     print("Loading trained model...")
     model = load_model(MODEL_PATH)
+    time_steps = model.input_shape[1]  # Windows must match the length the model was trained on
+
+    print("Creating sequences...")
+    scaled_data = scaler.transform(augment_features(df)).astype(np.float32)
+    sequences = sliding_windows(scaled_data, time_steps, WINDOW_STRIDE)
+    print(f"Prepared {len(sequences)} sequences for testing.")
 
     print("Calculating reconstruction errors...")
-    reconstructed = model.predict(sequences)
-    reconstruction_errors = np.mean(np.power(sequences - reconstructed, 2), axis=(1, 2))
+    reconstruction_errors = batch_reconstruction_errors(model, sequences, BATCH_SIZE)
 
     print("Optimizing threshold...")
     threshold = np.percentile(reconstruction_errors, 99)  # Use 99th percentile as threshold
@@ -107,7 +91,10 @@ def main():
 
     print("Evaluating model...")
     precision, recall, f1, cm = evaluate_model(
-        ground_truth_anomalies, anomaly_indices, len(df) - TIME_STEPS + 1, df["timestamp"][TIME_STEPS - 1:].values
+        ground_truth_anomalies,
+        anomaly_indices,
+        len(sequences),
+        df["timestamp"].values[window_end_indices(len(df), time_steps, WINDOW_STRIDE)],
     )
     print(f"Precision: {precision:.2f}")
     print(f"Recall: {recall:.2f}")
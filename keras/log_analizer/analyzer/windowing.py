@@ -0,0 +1,65 @@
+import math
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from tensorflow.keras.utils import Sequence
+
+
+def sliding_windows(data, time_steps, stride=1):
+    """
+    Returns a (num_windows, time_steps, features) float32 view over a 2D array.
+    No window is copied: consecutive windows share the same underlying rows.
+    """
+    data = np.asarray(data, dtype=np.float32)  # Only copies if data is not float32 already
+    windows = sliding_window_view(data, time_steps, axis=0)  # (num_windows, features, time_steps)
+    return windows.transpose(0, 2, 1)[::stride]
+
+
+def window_end_indices(num_rows, time_steps, stride=1):
+    """Row index of the last timestep of every window, to map windows back to timestamps."""
+    return np.arange(time_steps - 1, num_rows, stride)
+
+
+def split_window_indices(num_windows, validation_split):
+    """Same split as Keras' validation_split: the last fraction of the windows is held out."""
+    split_at = int(num_windows * (1 - validation_split))
+    indices = np.arange(num_windows)
+    return indices[:split_at], indices[split_at:]
+
+
+class WindowSequence(Sequence):
+    """Feeds windows to model.fit/model.predict one batch at a time."""
+
+    def __init__(self, windows, batch_size, indices=None, shuffle=False, targets=True, seed=None):
+        super().__init__()
+        self.windows = windows
+        self.batch_size = batch_size
+        self.indices = np.arange(len(windows)) if indices is None else np.array(indices)
+        self.shuffle = shuffle
+        self.targets = targets  # Autoencoder targets are the inputs themselves
+        self.rng = np.random.default_rng(seed)
+        if self.shuffle:
+            self.rng.shuffle(self.indices)
+
+    def __len__(self):
+        return math.ceil(len(self.indices) / self.batch_size)
+
+    def __getitem__(self, batch_index):
+        batch_indices = self.indices[batch_index * self.batch_size:(batch_index + 1) * self.batch_size]
+        batch = self.windows[batch_indices]  # Only this batch is materialized
+        return (batch, batch) if self.targets else batch
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.indices)
+
+
+def batch_reconstruction_errors(model, windows, batch_size):
+    """Mean squared reconstruction error of every window, predicted batch by batch."""
+    errors = np.empty(len(windows), dtype=np.float32)
+    batches = WindowSequence(windows, batch_size, targets=False)
+    for batch_index in range(len(batches)):
+        batch = batches[batch_index]
+        reconstructed = np.asarray(model.predict_on_batch(batch))
+        start = batch_index * batch_size
+        errors[start:start + len(batch)] = np.mean(np.square(batch - reconstructed), axis=(1, 2))
+    return errors
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class BaseProcess:
     def __init__(self, name, cpu_usage=0.0, ram_usage=0.0, disk_usage=0.0, process_type="hourly"):
         """
@@ -29,3 +32,26 @@ class BaseProcess:
             return False
         else:
             raise ValueError(f"Unknown process type: {self.process_type}")
+
+
+    def schedule_mask(self, times, rng):
+        """
+        Vectorized should_run: returns a boolean mask over a whole timeline.
+        times: any object exposing minute/second/hour/weekday/day arrays and size
+        (a pandas DatetimeIndex or a precomputed calendar).
+        """
+        on_the_hour = (times.minute == 0) & (times.second == 0)
+        if self.process_type == "hourly":
+            return on_the_hour
+        elif self.process_type == "daily":
+            return on_the_hour & (times.hour == 0)
+        elif self.process_type == "weekly":
+            return on_the_hour & (times.hour == 0) & (times.weekday == 0)
+        elif self.process_type == "custom":
+            return np.zeros(times.size, dtype=bool)
+        else:
+            raise ValueError(f"Unknown process type: {self.process_type}")
+
+    def usage_arrays(self, count, rng):
+        """Returns the cpu, ram and disk contributions for `count` scheduled timesteps."""
+        return tuple(np.full(count, usage, dtype=float) for usage in self.get_resource_usage())
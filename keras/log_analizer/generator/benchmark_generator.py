@@ -0,0 +1,40 @@
+import time
+from datetime import datetime, timedelta
+
+from generator import generate_logs_loop, generate_logs_vectorized, generate_logs_simulated, RANDOM_SEED
+
+# Benchmark settings
+BENCHMARK_MONTHS = [1, 4]  # Simulated months per run
+REPEATS = 3  # Best-of-N timing
+ENGINES = {
+    "loop": generate_logs_loop,
+    "vectorized": generate_logs_vectorized,
+    "simulation": generate_logs_simulated,
+}
+
+
+def time_engine(engine, start_time, end_time):
+    """Returns the best wall time of an engine and the number of rows it produced."""
+    best = float("inf")
+    rows = 0
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        df, _ = engine(start_time, end_time, seed=RANDOM_SEED)
+        best = min(best, time.perf_counter() - started)
+        rows = len(df)
+    return best, rows
+
+
+def main():
+    start_time = datetime(2024, 1, 1)
+    print(f"{'months':>6} | {'engine':>10} | {'rows':>10} | {'time (s)':>9} | {'vs loop':>7}")
+    for months in BENCHMARK_MONTHS:
+        end_time = start_time + timedelta(weeks=4 * months)
+        timings = {name: time_engine(engine, start_time, end_time) for name, engine in ENGINES.items()}
+        loop_time = timings["loop"][0]
+        for name, (elapsed, rows) in timings.items():
+            print(f"{months:>6} | {name:>10} | {rows:>10} | {elapsed:>9.3f} | {loop_time / elapsed:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
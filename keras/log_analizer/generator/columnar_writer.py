@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+
+# Binary column layout shared with analyzer/log_io.py
+COLUMN_DTYPES = {
+    "timestamp": np.int64,  # Seconds since the epoch
+    "cpu": np.float32,
+    "ram": np.float32,
+    "disk": np.float32,
+}
+
+
+def to_columns(logs):
+    """Converts a logs DataFrame to the binary column layout."""
+    return {
+        "timestamp": logs["timestamp"].to_numpy("datetime64[s]").astype(np.int64),
+        "cpu": logs["cpu"].to_numpy(np.float32),
+        "ram": logs["ram"].to_numpy(np.float32),
+        "disk": logs["disk"].to_numpy(np.float32),
+    }
+
+
+class NpyLogWriter:
+    """Writes one memory-mappable .npy file per column, filled chunk by chunk."""
+
+    def __init__(self, directory, total_rows):
+        self.directory = directory
+        self.total_rows = total_rows
+        self.columns = {}
+        self.offset = 0
+
+    def __enter__(self):
+        os.makedirs(self.directory, exist_ok=True)
+        for name, dtype in COLUMN_DTYPES.items():
+            path = os.path.join(self.directory, f"{name}.npy")
+            self.columns[name] = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(self.total_rows,))
+        return self
+
+    def write(self, logs, anomalies):
+        end = self.offset + len(logs)
+        for name, values in to_columns(logs).items():
+            self.columns[name][self.offset:end] = values
+        self.offset = end
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for column in self.columns.values():
+            column.flush()
+        self.columns = {}
+        if exc_type is None and self.offset != self.total_rows:
+            raise ValueError(f"Expected {self.total_rows} rows but {self.offset} were written to {self.directory}")
+
+
+class ParquetLogWriter:
+    """Writes the binary column layout to a Parquet file, one row group per chunk (requires pyarrow)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+
+    def __enter__(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.schema = pa.schema([(name, pa.from_numpy_dtype(dtype)) for name, dtype in COLUMN_DTYPES.items()])
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.writer = pq.ParquetWriter(self.path, self.schema)
+        return self
+
+    def write(self, logs, anomalies):
+        import pyarrow as pa
+
+        self.writer.write_table(pa.table(to_columns(logs), schema=self.schema))
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.writer.close()
@@ -7,3 +7,6 @@ class CustomProcess(BaseProcess):
     def should_run(self, current_time):
         # Custom logic: Run every 15 minutes
         return current_time.minute % 15 == 0 and current_time.second == 0
+
+    def schedule_mask(self, times, rng):
+        return (times.minute % 15 == 0) & (times.second == 0)
@@ -2,10 +2,17 @@
 from base_process import BaseProcess
 
 class DataMigrationProcess(BaseProcess):
+    def __init__(self, name="DataMigration"):
+        super().__init__(name, cpu_usage=40, ram_usage=30, disk_usage=60, process_type="custom")
+
     def run(self, current_time):
         if self.is_scheduled(current_time):
-            return {"cpu": 40, "ram": 30, "disk": 60}
+            cpu, ram, disk = self.get_resource_usage()
+            return {"cpu": cpu, "ram": ram, "disk": disk}
         return {"cpu": 0, "ram": 0, "disk": 0}
 
     def is_scheduled(self, current_time):
         return current_time.weekday() == 0 and current_time.hour == 22
+
+    def schedule_mask(self, times, rng):
+        return (times.weekday == 0) & (times.hour == 22)
@@ -2,10 +2,17 @@
 from base_process import BaseProcess
 
 class DatabaseQueryProcess(BaseProcess):
+    def __init__(self, name="DatabaseQuery"):
+        super().__init__(name, cpu_usage=20, ram_usage=50, disk_usage=10, process_type="custom")
+
     def run(self, current_time):
         if self.is_scheduled(current_time):
-            return {"cpu": 20, "ram": 50, "disk": 10}
+            cpu, ram, disk = self.get_resource_usage()
+            return {"cpu": cpu, "ram": ram, "disk": disk}
         return {"cpu": 0, "ram": 0, "disk": 0}
 
     def is_scheduled(self, current_time):
-        return current_time.hour % 4 == 0 and current_time.minute == 0
+        return current_time.hour % 4 == 0 and current_time.minute == 0 and current_time.second == 0
+
+    def schedule_mask(self, times, rng):
+        return (times.hour % 4 == 0) & (times.minute == 0) & (times.second == 0)
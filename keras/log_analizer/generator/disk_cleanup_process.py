@@ -2,10 +2,17 @@
 from base_process import BaseProcess
 
 class DiskCleanupProcess(BaseProcess):
+    def __init__(self, name="DiskCleanup"):
+        super().__init__(name, cpu_usage=10, ram_usage=5, disk_usage=-30, process_type="custom")
+
     def run(self, current_time):
         if self.is_scheduled(current_time):
-            return {"cpu": 10, "ram": 5, "disk": -30}
+            cpu, ram, disk = self.get_resource_usage()
+            return {"cpu": cpu, "ram": ram, "disk": disk}
         return {"cpu": 0, "ram": 0, "disk": 0}
 
     def is_scheduled(self, current_time):
         return current_time.day == 1 and current_time.hour == 4
+
+    def schedule_mask(self, times, rng):
+        return (times.day == 1) & (times.hour == 4)
@@ -2,6 +2,8 @@
 
 import random
 
+import numpy as np
+
 # Event type-specific probabilities and impacts
 EVENTS = {
     "Unexpected Spike": {
@@ -35,3 +37,16 @@ def apply_event(event_type, cpu, ram, disk):
     ram = round(random.uniform(*event["ram_range"]), 1)
     disk = min(round(disk + event["disk_increase"], 1), 100)  # Cap disk at 100%
     return cpu, ram, disk
+
+
+def draw_event_mask(event_type, size, rng):
+    """Batch version of should_trigger_event: one Bernoulli draw per timestep."""
+    return rng.random(size) < EVENTS[event_type]["probability"]
+
+def apply_event_batch(event_type, mask, cpu, ram, disk, rng):
+    """Applies the impact of an event in place to every timestep selected by mask."""
+    event = EVENTS[event_type]
+    count = int(mask.sum())
+    cpu[mask] = np.round(rng.uniform(*event["cpu_range"], count), 1)
+    ram[mask] = np.round(rng.uniform(*event["ram_range"], count), 1)
+    disk[mask] = np.minimum(np.round(disk[mask] + event["disk_increase"], 1), 100)  # Cap disk at 100%
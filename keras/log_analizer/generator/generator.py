@@ -1,29 +1,121 @@
 import random
+from contextlib import ExitStack
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import os
+import shutil
+
+from columnar_writer import NpyLogWriter, ParquetLogWriter
+from simulation import simulate
 
 # Constants
 LOG_FILE_PATH = "/app/logs/server_logs.txt"
 DEBUG_LOG_FILE_PATH = "/app/logs/debug_logs.txt"
+LOG_NPY_DIR = "/app/logs/server_logs"  # One memory-mappable .npy file per column
+LOG_PARQUET_PATH = "/app/logs/server_logs.parquet"
+OUTPUT_FORMATS = ["text", "npy"]  # Any of "text", "npy", "parquet" (parquet requires pyarrow)
 CHARTS_OUTPUT_DIR = "/app/charts/"
 TIME_PERIOD = 4  # Number of months to generate data
 LOG_INTERVAL = 30  # Log interval in seconds
 ANOMALY_PROBABILITY = 0.0005  # 0.05% chance of anomaly
+# "simulation" (PROCESSES + EVENTS), "vectorized" (NumPy bulk) or "loop" (one row at a time)
+GENERATION_ENGINE = "simulation"
+RANDOM_SEED = 42  # Fixed seed so runs are reproducible
+CHUNK_SIZE = 100_000  # Rows generated, written and aggregated per streaming step
+RNG_BLOCK_SIZE = 20_160  # Rows drawn from one random stream (a week at 30 s); chunks hold whole blocks
+WRITE_BUFFER_SIZE = 1 << 20  # 1 MiB file buffer for bulk writes
+HISTOGRAM_BINS = np.linspace(0, 100, 51)  # Fixed bins so histograms can be accumulated chunk by chunk
+TIME_SERIES_RESOLUTION = "10min"  # Bucket size of the time-series charts
 
 # Amplified anomaly effects
 CPU_ANOMALY_RANGE = (80, 100)  # CPU spikes to 80-100%
 RAM_ANOMALY_RANGE = (90, 100)  # RAM spikes to 90-100%
 DISK_ANOMALY_INCREASE = 20     # Disk increases by 20%
 
+# Schema shared by both engines, the log writer and the charts
+LOG_COLUMNS = ["timestamp", "cpu", "ram", "disk", "is_anomaly"]
+ANOMALY_COLUMNS = ["timestamp", "event"]
+
 
 def generate_logs():
-    """Generates synthetic logs with anomalies."""
-    print(f"Starting log generation for {TIME_PERIOD} months...")
+    """Generates synthetic logs with anomalies, streaming them to disk chunk by chunk."""
+    print(f"Starting log generation for {TIME_PERIOD} months ({GENERATION_ENGINE} engine)...")
 
     start_time = datetime(2024, 1, 1)  # Example start date
     end_time = start_time + timedelta(weeks=4 * TIME_PERIOD)
+
+    remove_stale_outputs()
+    aggregates = MetricAggregates()
+    with ExitStack() as stack:
+        writers = [stack.enter_context(writer) for writer in build_writers(count_timeline(start_time, end_time))]
+        for df, anomalies in iter_log_chunks(start_time, end_time, seed=RANDOM_SEED):
+            for writer in writers:
+                writer.write(df, anomalies)
+            aggregates.update(df)
+
+    print(f"Generated {aggregates.total_rows} log entries for {TIME_PERIOD} months.")
+    print(f"Anomalies detected: {aggregates.total_anomalies}")
+
+    # Plot charts
+    plot_distributions(aggregates.histograms)
+    plot_time_series_with_anomalies(aggregates.time_series(), aggregates.anomaly_points(), CHARTS_OUTPUT_DIR)
+
+
+def build_writers(total_rows):
+    """Creates one writer per OUTPUT_FORMATS entry; the debug log is always written."""
+    writers = [DebugLogWriter(DEBUG_LOG_FILE_PATH)]
+    for output_format in OUTPUT_FORMATS:
+        if output_format == "text":
+            writers.append(TextLogWriter(LOG_FILE_PATH))
+        elif output_format == "npy":
+            writers.append(NpyLogWriter(LOG_NPY_DIR, total_rows))
+        elif output_format == "parquet":
+            writers.append(ParquetLogWriter(LOG_PARQUET_PATH))
+        else:
+            raise ValueError(f"Unknown output format: {output_format}")
+    return writers
+
+
+def remove_stale_outputs():
+    """
+    Deletes log copies in formats this run does not write, since the analyzer reads the
+    fastest copy it finds and would otherwise pick up data from an earlier run.
+    """
+    outputs = {"text": LOG_FILE_PATH, "npy": LOG_NPY_DIR, "parquet": LOG_PARQUET_PATH}
+    for output_format, path in outputs.items():
+        if output_format in OUTPUT_FORMATS:
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def iter_log_chunks(start_time, end_time, seed=None):
+    """
+    Yields (logs, anomalies) DataFrames for the configured engine, CHUNK_SIZE rows
+    rounded down to whole RNG_BLOCK_SIZE blocks (at least one block) per chunk.
+    """
+    if GENERATION_ENGINE == "loop":
+        # The reference loop is not chunked; it is only meant for small runs and benchmarks
+        yield generate_logs_loop(start_time, end_time, seed=seed)
+        return
+
+    chunk_engines = {"simulation": simulated_chunk, "vectorized": vectorized_chunk}
+    if GENERATION_ENGINE not in chunk_engines:
+        raise ValueError(f"Unknown generation engine: {GENERATION_ENGINE}")
+
+    seed_sequence = np.random.SeedSequence(seed)
+    chunk_rows = max(1, CHUNK_SIZE // RNG_BLOCK_SIZE) * RNG_BLOCK_SIZE
+    for index, timestamps in enumerate(iter_timeline(start_time, end_time, chunk_rows)):
+        yield generate_blocks(chunk_engines[GENERATION_ENGINE], timestamps, index * chunk_rows, seed_sequence)
+
+
+def generate_logs_loop(start_time, end_time, seed=None):
+    """Generates logs one timestamp at a time (reference implementation)."""
+    rng = random.Random(seed)
     current_time = start_time
 
     logs = []
@@ -31,16 +123,16 @@ def generate_logs():
 
     while current_time < end_time:
         # Generate normal system metrics
-        cpu = round(random.uniform(5, 50), 1)  # Normal CPU usage
-        ram = round(random.uniform(10, 70), 1)  # Normal RAM usage
-        disk = round(random.uniform(2, 30), 1)  # Normal Disk usage
+        cpu = round(rng.uniform(5, 50), 1)  # Normal CPU usage
+        ram = round(rng.uniform(10, 70), 1)  # Normal RAM usage
+        disk = round(rng.uniform(2, 30), 1)  # Normal Disk usage
 
         is_anomaly = False
 
         # Check if this log entry will be an anomaly
-        if random.random() < ANOMALY_PROBABILITY:
-            cpu = round(random.uniform(*CPU_ANOMALY_RANGE), 1)
-            ram = round(random.uniform(*RAM_ANOMALY_RANGE), 1)
+        if rng.random() < ANOMALY_PROBABILITY:
+            cpu = round(rng.uniform(*CPU_ANOMALY_RANGE), 1)
+            ram = round(rng.uniform(*RAM_ANOMALY_RANGE), 1)
             disk = min(round(disk + DISK_ANOMALY_INCREASE, 1), 100)  # Cap disk at 100%
             anomalies.append({"timestamp": current_time, "event": "Anomaly Detected"})
             is_anomaly = True
@@ -55,36 +147,189 @@ def generate_logs():
 
         current_time += timedelta(seconds=LOG_INTERVAL)
 
-    print(f"Generated {len(logs)} log entries for {TIME_PERIOD} months.")
-    print(f"Anomalies detected: {len(anomalies)}")
+    return pd.DataFrame(logs, columns=LOG_COLUMNS), pd.DataFrame(anomalies, columns=ANOMALY_COLUMNS)
 
-    # Save logs to file
-    save_logs_to_files(logs, anomalies)
 
-    # Plot charts
-    df = pd.DataFrame(logs)
-    plot_distributions(df)
-    plot_time_series_with_anomalies(df, CHARTS_OUTPUT_DIR)
+def build_timeline(start_time, end_time):
+    """Builds every log timestamp at once instead of stepping a datetime."""
+    start = np.datetime64(start_time, "s")
+    end = np.datetime64(end_time, "s")
+    return np.arange(start, end, np.timedelta64(LOG_INTERVAL, "s")).astype("datetime64[ns]")
+
+
+def count_timeline(start_time, end_time):
+    """Number of log timestamps between start_time (inclusive) and end_time (exclusive)."""
+    return -(-(end_time - start_time) // timedelta(seconds=LOG_INTERVAL))  # Ceiling division
+
+
+def iter_timeline(start_time, end_time, chunk_size):
+    """Yields the timeline in consecutive slices of at most chunk_size timestamps."""
+    start = np.datetime64(start_time, "ns")
+    interval = np.timedelta64(LOG_INTERVAL, "s").astype("timedelta64[ns]")
+    total = count_timeline(start_time, end_time)
+    for offset in range(0, total, chunk_size):
+        steps = np.arange(offset, min(offset + chunk_size, total))
+        yield start + steps * interval
+
+
+def generate_blocks(chunk_engine, timestamps, first_step, seed_sequence):
+    """
+    Runs chunk_engine over RNG_BLOCK_SIZE slices of a timeline slice that starts at
+    step `first_step` (a multiple of RNG_BLOCK_SIZE). Every block draws from its own
+    stream, spawned from the seed by block number, so the logs depend only on the seed
+    and the time range, never on how the timeline is chunked.
+    """
+    parts = []
+    for offset in range(0, max(len(timestamps), 1), RNG_BLOCK_SIZE):
+        block = (first_step + offset) // RNG_BLOCK_SIZE
+        rng = np.random.default_rng(np.random.SeedSequence(seed_sequence.entropy, spawn_key=(block,)))
+        parts.append(chunk_engine(timestamps[offset:offset + RNG_BLOCK_SIZE], rng))
+    logs, anomalies = zip(*parts)
+    return pd.concat(logs, ignore_index=True), pd.concat(anomalies, ignore_index=True)
+
+
+def generate_logs_vectorized(start_time, end_time, seed=None):
+    """Generates the same log schema as generate_logs_loop using bulk NumPy draws."""
+    return generate_blocks(vectorized_chunk, build_timeline(start_time, end_time), 0, np.random.SeedSequence(seed))
+
+
+def generate_logs_simulated(start_time, end_time, seed=None):
+    """Generates logs from the PROCESSES registry and EVENTS table, labelling each anomaly with its event type."""
+    return generate_blocks(simulated_chunk, build_timeline(start_time, end_time), 0, np.random.SeedSequence(seed))
+
+
+def vectorized_chunk(timestamps, rng):
+    """Builds baseline metrics and anomaly masks for a slice of the timeline in bulk."""
+    n = len(timestamps)
+
+    # Normal system metrics
+    cpu = np.round(rng.uniform(5, 50, n), 1)
+    ram = np.round(rng.uniform(10, 70, n), 1)
+    disk = np.round(rng.uniform(2, 30, n), 1)
+
+    # Anomaly mask and amplified values for the selected rows only
+    is_anomaly = rng.random(n) < ANOMALY_PROBABILITY
+    n_anomalies = int(is_anomaly.sum())
+    cpu[is_anomaly] = np.round(rng.uniform(*CPU_ANOMALY_RANGE, n_anomalies), 1)
+    ram[is_anomaly] = np.round(rng.uniform(*RAM_ANOMALY_RANGE, n_anomalies), 1)
+    disk[is_anomaly] = np.minimum(np.round(disk[is_anomaly] + DISK_ANOMALY_INCREASE, 1), 100)  # Cap disk at 100%
+
+    event_types = np.where(is_anomaly, "Anomaly Detected", "")
+    return build_chunk(timestamps, cpu, ram, disk, event_types)
+
+
+def simulated_chunk(timestamps, rng):
+    """Composes process loads and EVENTS anomalies for a slice of the timeline."""
+    cpu, ram, disk, event_types = simulate(timestamps, rng)
+    return build_chunk(timestamps, cpu, ram, disk, event_types)
+
+
+def build_chunk(timestamps, cpu, ram, disk, event_types):
+    """Wraps metric arrays into the (logs, anomalies) schema; event_types is "" for normal rows."""
+    is_anomaly = event_types != ""
+    df = pd.DataFrame({
+        "timestamp": timestamps,
+        "cpu": cpu,
+        "ram": ram,
+        "disk": disk,
+        "is_anomaly": is_anomaly,
+    })
+    anomalies = pd.DataFrame({
+        "timestamp": timestamps[is_anomaly],
+        "event": event_types[is_anomaly],
+    }, columns=ANOMALY_COLUMNS)
+    return df, anomalies
+
+
+def format_log_lines(df):
+    """Formats a logs DataFrame as server_logs.txt lines in one vectorized pass."""
+    return (
+        df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")
+        + " | CPU: " + df["cpu"].astype(str)
+        + "% | RAM: " + df["ram"].astype(str)
+        + "% | Disk: " + df["disk"].astype(str)
+        + "%\n"
+    )
+
+
+class TextLogWriter:
+    """Appends log chunks to server_logs.txt with buffered bulk writes."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.file = open(self.path, "w", buffering=WRITE_BUFFER_SIZE)
+        return self
+
+    def write(self, logs, anomalies):
+        self.file.write("".join(format_log_lines(logs)))
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.file.close()
+
+
+class DebugLogWriter(TextLogWriter):
+    """Appends the anomalies of each chunk to debug_logs.txt."""
+
+    def write(self, logs, anomalies):
+        self.file.write("".join(
+            f"{anomaly.timestamp} | EVENT: {anomaly.event}\n" for anomaly in anomalies.itertuples(index=False)
+        ))
+
+
+class MetricAggregates:
+    """Chart inputs updated chunk by chunk so no full copy of the logs is kept in memory."""
+
+    METRICS = ["cpu", "ram", "disk"]
+
+    def __init__(self):
+        self.total_rows = 0
+        self.total_anomalies = 0
+        self.histograms = {metric: np.zeros(len(HISTOGRAM_BINS) - 1, dtype=np.int64) for metric in self.METRICS}
+        self._bucket_sums = []  # Per-bucket sums of completed buckets, one frame per chunk
+        self._open_bucket = None  # Sums of the last bucket seen, which the next chunk may continue
+        self._anomaly_rows = []
+
+    def update(self, df):
+        self.total_rows += len(df)
+        for metric in self.METRICS:
+            self.histograms[metric] += np.histogram(df[metric], bins=HISTOGRAM_BINS)[0]
 
+        # Chunks arrive in time order, so only the bucket at a chunk boundary can span two chunks
+        buckets = df["timestamp"].dt.floor(TIME_SERIES_RESOLUTION)
+        grouped = df[self.METRICS].groupby(buckets)
+        sums = grouped.sum().join(grouped.size().rename("count"))
+        if self._open_bucket is not None:
+            if sums.index[0] == self._open_bucket.index[0]:
+                sums.iloc[0] += self._open_bucket.iloc[0]
+            else:
+                self._bucket_sums.append(self._open_bucket)
+        self._bucket_sums.append(sums.iloc[:-1])
+        self._open_bucket = sums.iloc[-1:]
 
-def save_logs_to_files(logs, anomalies):
-    """Saves logs and anomalies to files."""
-    os.makedirs(os.path.dirname(LOG_FILE_PATH), exist_ok=True)
+        anomaly_rows = df.loc[df["is_anomaly"], ["timestamp"] + self.METRICS]
+        self.total_anomalies += len(anomaly_rows)
+        self._anomaly_rows.append(anomaly_rows)
 
-    with open(LOG_FILE_PATH, "w") as log_file:
-        for log in logs:
-            log_file.write(f"{log['timestamp']} | CPU: {log['cpu']}% | RAM: {log['ram']}% | Disk: {log['disk']}%\n")
+    def time_series(self):
+        """Mean of each metric per TIME_SERIES_RESOLUTION bucket."""
+        sums = pd.concat(self._bucket_sums + [self._open_bucket])
+        series = sums[self.METRICS].div(sums["count"], axis=0)
+        return series.rename_axis("timestamp").reset_index()
 
-    with open(DEBUG_LOG_FILE_PATH, "w") as debug_file:
-        for anomaly in anomalies:
-            debug_file.write(f"{anomaly['timestamp']} | EVENT: {anomaly['event']}\n")
+    def anomaly_points(self):
+        """Exact metric values of every anomalous row."""
+        return pd.concat(self._anomaly_rows, ignore_index=True)
 
 
-def plot_distributions(df):
-    """Plots distributions of CPU, RAM, and Disk usage."""
+def plot_distributions(histograms):
+    """Plots distributions of CPU, RAM, and Disk usage from accumulated histograms."""
     for metric, color in zip(["cpu", "ram", "disk"], ["blue", "green", "orange"]):
         plt.figure()
-        plt.hist(df[metric], bins=50, color=color, alpha=0.7)
+        plt.hist(HISTOGRAM_BINS[:-1], bins=HISTOGRAM_BINS, weights=histograms[metric], color=color, alpha=0.7)
         plt.title(f"{metric.upper()} Usage Distribution ({TIME_PERIOD} months)")
         plt.xlabel(f"{metric.upper()} Usage (%)")
         plt.ylabel("Frequency")
@@ -94,26 +339,27 @@ def plot_distributions(df):
     print("Saved usage distribution charts.")
 
 
-def plot_time_series_with_anomalies(df, output_dir):
+def plot_time_series_with_anomalies(series, anomaly_points, output_dir):
     """Plots each system metric over time with anomalies marked, split by month."""
-    df["month"] = df["timestamp"].dt.to_period("M")  # Extract the month from the timestamp
+    series["month"] = series["timestamp"].dt.to_period("M")  # Extract the month from the timestamp
+    anomaly_points["month"] = anomaly_points["timestamp"].dt.to_period("M")
 
     metrics = ["cpu", "ram", "disk"]
     colors = {"cpu": "blue", "ram": "green", "disk": "orange"}
 
     for metric in metrics:
-        for month, month_data in df.groupby("month"):
+        for month, month_data in series.groupby("month"):
             plt.figure(figsize=(12, 6))
             plt.plot(
                 month_data["timestamp"],
                 month_data[metric],
-                label=f"{metric.upper()} Usage (%)",
+                label=f"{metric.upper()} Usage (%, {TIME_SERIES_RESOLUTION} mean)",
                 color=colors[metric],
                 alpha=0.7,
             )
 
             # Mark anomalies
-            anomalies = month_data[month_data["is_anomaly"]]
+            anomalies = anomaly_points[anomaly_points["month"] == month]
             if not anomalies.empty:
                 plt.scatter(
                     anomalies["timestamp"],
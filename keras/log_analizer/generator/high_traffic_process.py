@@ -3,10 +3,20 @@ from base_process import BaseProcess
 import random
 
 class HighTrafficProcess(BaseProcess):
+    TRAFFIC_PROBABILITY = 0.05  # 5% chance each time step
+
+    def __init__(self, name="HighTraffic"):
+        super().__init__(name, cpu_usage=70, ram_usage=50, disk_usage=10, process_type="custom")
+
     def run(self, current_time):
         if self.is_scheduled(current_time):
-            return {"cpu": 70, "ram": 50, "disk": 10}
+            cpu, ram, disk = self.get_resource_usage()
+            return {"cpu": cpu, "ram": ram, "disk": disk}
         return {"cpu": 0, "ram": 0, "disk": 0}
 
     def is_scheduled(self, current_time):
-        return random.random() < 0.05  # 5% chance each time step
+        return random.random() < self.TRAFFIC_PROBABILITY
+
+    def schedule_mask(self, times, rng):
+        # One batch of Bernoulli draws for the whole timeline
+        return rng.random(times.size) < self.TRAFFIC_PROBABILITY
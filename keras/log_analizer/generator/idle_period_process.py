@@ -2,10 +2,17 @@
 from base_process import BaseProcess
 
 class IdlePeriodProcess(BaseProcess):
+    def __init__(self, name="IdlePeriod"):
+        super().__init__(name, cpu_usage=2, ram_usage=5, disk_usage=1, process_type="custom")
+
     def run(self, current_time):
         if self.is_scheduled(current_time):
-            return {"cpu": 2, "ram": 5, "disk": 1}
+            cpu, ram, disk = self.get_resource_usage()
+            return {"cpu": cpu, "ram": ram, "disk": disk}
         return {"cpu": 0, "ram": 0, "disk": 0}
 
     def is_scheduled(self, current_time):
         return 0 <= current_time.hour < 6
+
+    def schedule_mask(self, times, rng):
+        return times.hour < 6
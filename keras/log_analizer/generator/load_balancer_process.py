@@ -2,10 +2,17 @@
 from base_process import BaseProcess
 
 class LoadBalancerProcess(BaseProcess):
+    def __init__(self, name="LoadBalancer"):
+        super().__init__(name, cpu_usage=50, ram_usage=30, disk_usage=5, process_type="custom")
+
     def run(self, current_time):
         if self.is_scheduled(current_time):
-            return {"cpu": 50, "ram": 30, "disk": 5}
+            cpu, ram, disk = self.get_resource_usage()
+            return {"cpu": cpu, "ram": ram, "disk": disk}
         return {"cpu": 0, "ram": 0, "disk": 0}
 
     def is_scheduled(self, current_time):
-        return current_time.minute % 30 == 0
+        return current_time.minute % 30 == 0 and current_time.second == 0
+
+    def schedule_mask(self, times, rng):
+        return (times.minute % 30 == 0) & (times.second == 0)
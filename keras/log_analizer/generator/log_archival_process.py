@@ -2,10 +2,17 @@
 from base_process import BaseProcess
 
 class LogArchivalProcess(BaseProcess):
+    def __init__(self, name="LogArchival"):
+        super().__init__(name, cpu_usage=10, ram_usage=5, disk_usage=50, process_type="custom")
+
     def run(self, current_time):
         if self.is_scheduled(current_time):
-            return {"cpu": 10, "ram": 5, "disk": 50}
+            cpu, ram, disk = self.get_resource_usage()
+            return {"cpu": cpu, "ram": ram, "disk": disk}
         return {"cpu": 0, "ram": 0, "disk": 0}
 
     def is_scheduled(self, current_time):
         return current_time.weekday() == 5 and current_time.hour == 3
+
+    def schedule_mask(self, times, rng):
+        return (times.weekday == 5) & (times.hour == 3)
@@ -1,6 +1,14 @@
 
 from base_process import BaseProcess
+import numpy as np
 
 class MonitoringService(BaseProcess):
+    def __init__(self, name="MonitoringService"):
+        super().__init__(name, cpu_usage=5, ram_usage=5, disk_usage=2, process_type="custom")
+
     def run(self, current_time):
-        return {"cpu": 5, "ram": 5, "disk": 2}  # Always running
+        cpu, ram, disk = self.get_resource_usage()
+        return {"cpu": cpu, "ram": ram, "disk": disk}  # Always running
+
+    def schedule_mask(self, times, rng):
+        return np.ones(times.size, dtype=bool)
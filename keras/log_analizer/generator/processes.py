@@ -1,9 +1,33 @@
 from base_process import BaseProcess
 from custom_process import CustomProcess
+from backup_process import BackupProcess
+from web_server_load import WebServerLoad
+from database_query_process import DatabaseQueryProcess
+from system_update_process import SystemUpdateProcess
+from idle_period_process import IdlePeriodProcess
+from high_traffic_process import HighTrafficProcess
+from backup_verification_process import BackupVerificationProcess
+from log_archival_process import LogArchivalProcess
+from disk_cleanup_process import DiskCleanupProcess
+from load_balancer_process import LoadBalancerProcess
+from monitoring_service import MonitoringService
+from data_migration_process import DataMigrationProcess
 
 PROCESSES = [
     BaseProcess("HourlyProcess", cpu_usage=5.0, ram_usage=2.0, process_type="hourly"),
     BaseProcess("DailyBackup", cpu_usage=10.0, ram_usage=5.0, disk_usage=20.0, process_type="daily"),
     BaseProcess("WeeklyReport", cpu_usage=3.0, ram_usage=1.0, process_type="weekly"),
     CustomProcess("CustomTask", cpu_usage=7.0, ram_usage=3.0),
+    BackupProcess(),
+    WebServerLoad(),
+    DatabaseQueryProcess(),
+    SystemUpdateProcess(),
+    IdlePeriodProcess(),
+    HighTrafficProcess(),
+    BackupVerificationProcess(),
+    LogArchivalProcess(),
+    DiskCleanupProcess(),
+    LoadBalancerProcess(),
+    MonitoringService(),
+    DataMigrationProcess(),
 ]
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from events import EVENTS, draw_event_mask, apply_event_batch
+from processes import PROCESSES
+
+# Baseline noise underneath the process loads
+BASELINE_CPU_RANGE = (2, 20)
+BASELINE_RAM_RANGE = (10, 30)
+BASELINE_DISK_RANGE = (2, 20)
+
+# Ceiling of the composed normal load, below the "Unexpected Spike" band (cpu 80-100, ram 90-100),
+# so coinciding processes never produce rows that look like that anomaly
+NORMAL_CPU_MAX = 75
+NORMAL_RAM_MAX = 85
+
+
+class Calendar:
+    """Calendar fields of a timeline, computed once and shared by every process schedule."""
+
+    def __init__(self, timestamps):
+        times = pd.DatetimeIndex(timestamps)
+        self.size = len(times)
+        self.second = times.second.to_numpy()
+        self.minute = times.minute.to_numpy()
+        self.hour = times.hour.to_numpy()
+        self.day = times.day.to_numpy()
+        self.weekday = times.weekday.to_numpy()
+
+
+def build_schedule(calendar, processes, rng):
+    """Precomputes the timeline indices at which each process runs."""
+    return [(process, np.flatnonzero(process.schedule_mask(calendar, rng))) for process in processes]
+
+
+def simulate(timestamps, rng, processes=PROCESSES):
+    """
+    Composes the load of every process and the EVENTS anomalies over a timeline.
+    Returns cpu, ram and disk arrays plus the event type of each timestep ("" when normal).
+    """
+    calendar = Calendar(timestamps)
+    n = calendar.size
+
+    cpu = rng.uniform(*BASELINE_CPU_RANGE, n)
+    ram = rng.uniform(*BASELINE_RAM_RANGE, n)
+    disk = rng.uniform(*BASELINE_DISK_RANGE, n)
+
+    # Add every process contribution at its precomputed indices
+    for process, indices in build_schedule(calendar, processes, rng):
+        process_cpu, process_ram, process_disk = process.usage_arrays(len(indices), rng)
+        cpu[indices] += process_cpu
+        ram[indices] += process_ram
+        disk[indices] += process_disk
+
+    cpu = np.round(np.clip(cpu, 0, NORMAL_CPU_MAX), 1)
+    ram = np.round(np.clip(ram, 0, NORMAL_RAM_MAX), 1)
+    disk = np.round(np.clip(disk, 0, 100), 1)
+
+    # Events are drawn in table order, so a later event overrides an earlier one on the same step
+    event_types = np.full(n, "", dtype=object)
+    for event_type in EVENTS:
+        mask = draw_event_mask(event_type, n, rng)
+        apply_event_batch(event_type, mask, cpu, ram, disk, rng)
+        event_types[mask] = event_type
+
+    check_normal_rows(cpu, ram, event_types)
+    return cpu, ram, disk, event_types
+
+
+def check_normal_rows(cpu, ram, event_types):
+    """Raises if a row labelled normal reaches the spike band, which would make the labels ambiguous."""
+    spike = EVENTS["Unexpected Spike"]
+    normal = event_types == ""
+    overlapping = normal & ((cpu >= spike["cpu_range"][0]) | (ram >= spike["ram_range"][0]))
+    if overlapping.any():
+        raise ValueError(f"{int(overlapping.sum())} normal rows reach the Unexpected Spike range; "
+                         "lower NORMAL_CPU_MAX / NORMAL_RAM_MAX or the process loads.")
@@ -2,10 +2,17 @@
 from base_process import BaseProcess
 
 class SystemUpdateProcess(BaseProcess):
+    def __init__(self, name="SystemUpdate"):
+        super().__init__(name, cpu_usage=30, ram_usage=10, disk_usage=40, process_type="custom")
+
     def run(self, current_time):
         if self.is_scheduled(current_time):
-            return {"cpu": 30, "ram": 10, "disk": 40}
+            cpu, ram, disk = self.get_resource_usage()
+            return {"cpu": cpu, "ram": ram, "disk": disk}
         return {"cpu": 0, "ram": 0, "disk": 0}
 
     def is_scheduled(self, current_time):
         return current_time.weekday() == 6 and current_time.hour == 2
+
+    def schedule_mask(self, times, rng):
+        return (times.weekday == 6) & (times.hour == 2)
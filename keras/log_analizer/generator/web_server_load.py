@@ -3,10 +3,25 @@ from base_process import BaseProcess
 import random
 
 class WebServerLoad(BaseProcess):
+    CPU_RANGE = (30, 50)
+    RAM_RANGE = (20, 40)
+
+    def __init__(self, name="WebServerLoad"):
+        super().__init__(name, disk_usage=5, process_type="custom")
+
     def run(self, current_time):
         if self.is_scheduled(current_time):
-            return {"cpu": random.uniform(30, 50), "ram": random.uniform(20, 40), "disk": 5}
+            return {"cpu": random.uniform(*self.CPU_RANGE), "ram": random.uniform(*self.RAM_RANGE), "disk": self.disk_usage}
         return {"cpu": 0, "ram": 0, "disk": 0}
 
     def is_scheduled(self, current_time):
-        return current_time.minute % 15 == 0
+        return current_time.minute % 15 == 0 and current_time.second == 0
+
+    def schedule_mask(self, times, rng):
+        return (times.minute % 15 == 0) & (times.second == 0)
+
+    def usage_arrays(self, count, rng):
+        cpu = rng.uniform(*self.CPU_RANGE, count)
+        ram = rng.uniform(*self.RAM_RANGE, count)
+        disk = super().usage_arrays(count, rng)[2]
+        return cpu, ram, disk